@@ -0,0 +1,101 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from main import ATLAS_DIRECTORY, ATLAS_MANIFEST, ATLAS_VERSION, pygame  # noqa: E402
+
+SOURCE_DIRECTORY = os.path.join('assets', 'gallery')
+PADDING = 2
+
+
+def load_source(path: str, max_side: int):
+    image = pygame.image.load(path)
+    # copy onto a plain 32-bit surface, palette images cannot be smoothscaled
+    surf = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+    surf.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+    longest = max(surf.get_size())
+    if max_side and longest > max_side:
+        width, height = surf.get_size()
+        surf = pygame.transform.smoothscale(surf, (max(1, width * max_side // longest),
+                                                   max(1, height * max_side // longest)))
+    return image.get_size(), surf
+
+
+def pack(sizes: dict, page_size: int):
+    # shelf packing, tallest first: each page is filled row by row
+    placements, pages = {}, []
+    for name, (width, height) in sorted(sizes.items(), key=lambda item: (-item[1][1], -item[1][0], item[0])):
+        width, height = width + PADDING, height + PADDING
+        if width > page_size or height > page_size:
+            raise ValueError(f'{name} is larger than a {page_size}px page, lower --max-side')
+        for index, page in enumerate(pages):
+            x, y, shelf = page
+            if x + width > page_size:
+                x, y, shelf = 0, y + shelf, 0
+            if y + height <= page_size:
+                break
+        else:
+            index, (x, y, shelf) = len(pages), (0, 0, 0)
+            pages.append(None)
+        placements[name] = index, (x, y)
+        pages[index] = x + width, y, max(shelf, height)
+    return placements, [y + shelf for _, y, shelf in pages]
+
+
+def build_atlas(source: str, output: str, page_size: int, max_side: int, page_format: str):
+    images = {}
+    for path in sorted(glob.glob(os.path.join(source, '*.png'))):
+        images[path] = load_source(path, max_side)
+    placements, heights = pack({path: surf.get_size() for path, (_, surf) in images.items()}, page_size)
+
+    pages = [pygame.Surface((page_size, height), pygame.SRCALPHA, 32) for height in heights]
+    manifest = {'version': ATLAS_VERSION, 'pages': [f'atlas_{index}.{page_format}' for index in range(len(pages))],
+                'page_sizes': [page.get_size() for page in pages], 'images': {}}
+    for path, (size, surf) in images.items():
+        index, position = placements[path]
+        # pages start fully transparent, so MAX copies the pixels untouched instead of blending them
+        pages[index].blit(surf, position, special_flags=pygame.BLEND_RGBA_MAX)
+        stat = os.stat(path)
+        manifest['images'][path.replace(os.sep, '/')] = {
+            'page': index, 'rect': [*position, *surf.get_size()], 'size': list(size),
+            'source': [stat.st_size, stat.st_mtime_ns]}
+
+    os.makedirs(output, exist_ok=True)
+    for stale in glob.glob(os.path.join(output, 'atlas_*.*')):
+        os.remove(stale)
+    for name, page in zip(manifest['pages'], pages):
+        if page_format == 'rgba':
+            with open(os.path.join(output, name), 'wb') as file:
+                file.write(pygame.image.tobytes(page, 'RGBA'))
+        else:
+            pygame.image.save(page, os.path.join(output, name))
+    with open(os.path.join(output, ATLAS_MANIFEST), 'w', encoding='utf8') as file:
+        json.dump(manifest, file, indent=1)
+        file.write('\n')
+    return manifest, pages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Pack the gallery images into texture atlas pages.')
+    parser.add_argument('--source', default=SOURCE_DIRECTORY, help='directory with the loose PNG files')
+    parser.add_argument('--output', default=ATLAS_DIRECTORY, help='directory for the pages and the manifest')
+    parser.add_argument('--page-size', type=int, default=2048, help='width and maximum height of a page')
+    parser.add_argument('--max-side', type=int, default=1024,
+                        help='downscale sources whose longest side is larger, 0 keeps every source as is')
+    parser.add_argument('--format', choices=('tga', 'png', 'rgba'), default='tga',
+                        help='page file format, run-length TGA decodes faster, PNG is smaller on disk, raw RGBA '
+                             'needs no decoding and is mapped straight from the asset pack')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    manifest, pages = build_atlas(args.source, args.output, args.page_size, args.max_side, args.format)
+    packed = sum(page.get_width() * page.get_height() * 4 for page in pages)
+    sys.stdout.write(f'{len(manifest["images"])} images in {len(pages)} pages '
+                     f'({packed / 1024 / 1024:.1f} MiB decoded) written to {args.output}\n')
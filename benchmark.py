@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import main  # noqa: E402
+from main import pygame  # noqa: E402
+
+INFOBOXES = {'plain': (1, 'flag_1'), 'question': (1, 'question_1'), 'with_button': (3, 'anthem_1'),
+             'question_with_button': (2, 'question_3')}
+# modes that fade in on their first frame
+FADE_IN_MODES = ('map', 'level_1', 'level_2', 'level_3')
+TOUR_FRAMES = 3600
+
+
+class KeyState(frozenset):
+    __getitem__ = frozenset.__contains__
+
+
+class ScriptedInput:
+    def __init__(self):
+        self.keys = KeyState()
+        self.mouse_position = (0, 0)
+        self.mouse_buttons = (False, False, False)
+
+    def install(self):
+        pygame.key.get_pressed = lambda: self.keys
+        pygame.mouse.get_pos = lambda: self.mouse_position
+        pygame.mouse.get_pressed = lambda *args, **kwargs: self.mouse_buttons
+
+    def press(self, *keys):
+        self.keys = KeyState(keys)
+
+    def release(self):
+        self.keys = KeyState()
+
+
+def new_game(screen_width: int, screen_height: int):
+    game = main.Game(main.open_display((screen_width, screen_height)))
+    for level in (1, 2, 3):
+        game.levels.build(level, game.screen, game.player)
+    return game
+
+
+def enter_level(game: main.Game, level: int):
+    game.player.rect.x, game.player.rect.y = 20, game.player.map_ground[1].y - game.player.rect.height
+    game.player.direction.update(0, 0)
+    game.colliding = False
+    for room in game.levels.rooms.values():
+        room.interactables.displayed = None
+    main.INPUT.reset()
+
+
+def step(game: main.Game, events: list = ()):
+    # one pass of the main loop without the wait, so the profiler laps land in the same phases
+    main.PROFILER.next_frame()
+    main.PROFILER.lap('wait')
+    game.frame(list(events))
+
+
+def percentile(quantiles: list, p: int):
+    return quantiles[p - 1] if quantiles else 0
+
+
+def frame_times(times: list):
+    quantiles = statistics.quantiles(times, n=100) if len(times) > 1 else []
+    return {'frames': len(times), 'mean_ms': statistics.fmean(times), 'p50_ms': percentile(quantiles, 50),
+            'p95_ms': percentile(quantiles, 95), 'p99_ms': percentile(quantiles, 99), 'max_ms': max(times)}
+
+
+def measure(game: main.Game, scripted: ScriptedInput, mode: str, frames: int, setup=None,
+            previous_mode: str = None):
+    def run(count):
+        times = []
+        game.mode, game.previous_mode, game.first_time = mode, previous_mode, False
+        main.RENDERER.invalidate()
+        main.TIMESTEP.reset()
+        if setup:
+            setup()
+        for _ in range(count):
+            start = time.perf_counter()
+            step(game)
+            times.append((time.perf_counter() - start) * 1000)
+            scripted.release()
+        return times
+
+    times = run(frames)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run(min(frames, 60))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {**frame_times(times), 'alloc_net_kib': (current - before) / 1024,
+            'alloc_peak_kib': (peak - before) / 1024}
+
+
+def measure_simulation(game: main.Game, scripted: ScriptedInput, ticks: int):
+    # physics only, no drawing or presenting, as fast as the CPU allows
+    results = {}
+    for level in (1, 2, 3):
+        enter_level(game, level)
+        start = time.perf_counter()
+        for tick in range(ticks):
+            scripted.press(pygame.K_d if tick // 90 % 2 else pygame.K_a, pygame.K_SPACE)
+            main.INPUT.sample()
+            main.simulate(f'level_{level}', game.player, game.levels, False)
+        elapsed = time.perf_counter() - start
+        scripted.release()
+        results[f'level_{level}'] = {'ticks': ticks, 'ticks_per_second': ticks / elapsed,
+                                     'realtime_factor': ticks / main.TICK_RATE / elapsed}
+    return results
+
+
+def open_infobox(game: main.Game, scripted: ScriptedInput, level: int, key: str):
+    def setup():
+        enter_level(game, level)
+        game.player.rect.center = game.levels.rooms[level].rects[key].center
+        scripted.press(pygame.K_e)
+        step(game)
+    return setup
+
+
+def click(scripted: ScriptedInput, button: main.Button):
+    # hover, press and release: a button fires on the release
+    scripted.mouse_position = button.top_rect.center
+    for pressed in (False, True, False):
+        scripted.mouse_buttons = (pressed, False, False)
+        yield
+
+
+def tap(scripted: ScriptedInput, key: int):
+    scripted.press(key)
+    yield
+    scripted.release()
+    yield
+
+
+def settle(game: main.Game, mode: str):
+    # until the fades around a mode change have finished
+    while game.mode != mode or main.TRANSITION.active or (game.first_time and mode in FADE_IN_MODES):
+        yield
+
+
+def walk_to(game: main.Game, scripted: ScriptedInput, rect: pygame.Rect):
+    while not game.player.rect.colliderect(rect):
+        scripted.press(pygame.K_d if game.player.rect.centerx < rect.centerx else pygame.K_a)
+        yield
+    scripted.release()
+    yield
+
+
+def tour(game: main.Game, scripted: ScriptedInput):
+    # a short play-through: the title buttons, the walk into the first house, a question and the way back out
+    yield from click(scripted, game.credit_button)
+    yield from settle(game, 'credit_screen')
+    yield from click(scripted, game.back_button)
+    yield from settle(game, 'title_screen')
+    yield from click(scripted, game.start_button)
+    yield from settle(game, 'map')
+    yield from walk_to(game, scripted, game.uprising_house_rect)
+    yield from tap(scripted, pygame.K_e)
+    yield from settle(game, 'level_1')
+    game.player.rect.center = game.levels.rooms[1].rects['question_1'].center
+    yield from tap(scripted, pygame.K_e)
+    infobox = main.INFOBOXES.get(game.levels.rooms[1].infoboxes['question_1'])
+    yield from click(scripted, infobox.question[infobox.correct_answer - 1])
+    yield from tap(scripted, pygame.K_e)
+    yield from walk_to(game, scripted, game.levels.door_rect)
+    yield from tap(scripted, pygame.K_e)
+    yield from settle(game, 'map')
+    yield from tap(scripted, pygame.K_p)
+    yield from settle(game, 'game_menu')
+    yield from click(scripted, game.menu_continue_button)
+    yield from settle(game, 'map')
+
+
+def measure_tour(game: main.Game, scripted: ScriptedInput, limit: int):
+    # paced like the game, the fades and the physics run on the wall clock
+    clock, times, modes = pygame.time.Clock(), [], []
+    script = tour(game, scripted)
+    main.RENDERER.invalidate()
+    main.TIMESTEP.reset()
+    completed = False
+    for _ in range(limit):
+        try:
+            next(script)
+        except StopIteration:
+            completed = True
+            break
+        clock.tick(main.FRAME_RATE)
+        start = time.perf_counter()
+        step(game)
+        times.append((time.perf_counter() - start) * 1000)
+        if not modes or modes[-1] != game.mode:
+            modes.append(game.mode)
+    scripted.release()
+    scripted.mouse_buttons = (False, False, False)
+    return {**frame_times(times), 'completed': completed, 'modes': modes}
+
+
+def run_benchmark(frames: int, screen_width: int, screen_height: int):
+    scripted = ScriptedInput()
+    scripted.install()
+
+    start = time.perf_counter()
+    game = new_game(screen_width, screen_height)
+    results = {'startup_ms': (time.perf_counter() - start) * 1000, 'frames_per_mode': frames,
+               'resolution': [screen_width, screen_height], 'scaled': main.RENDERER.scaled, 'modes': {}}
+
+    results['tour'] = measure_tour(game, scripted, TOUR_FRAMES)
+
+    for mode, previous_mode in (('title_screen', None), ('credit_screen', 'title_screen'), ('map', None),
+                                ('game_menu', 'map'), ('victory_screen', None)):
+        results['modes'][mode] = measure(game, scripted, mode, frames, previous_mode=previous_mode)
+    for level in (1, 2, 3):
+        results['modes'][f'level_{level}'] = measure(game, scripted, f'level_{level}', frames,
+                                                     lambda: enter_level(game, level))
+    for category, (level, key) in INFOBOXES.items():
+        results['modes'][f'level_{level}:infobox:{category}'] = measure(
+            game, scripted, f'level_{level}', frames, open_infobox(game, scripted, level, key))
+
+    results['simulation'] = measure_simulation(game, scripted, frames * 10)
+
+    results['peak_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['assets'] = main.ASSETS.stats()
+    results['infoboxes'] = main.INFOBOXES.stats()
+    results['atlas'] = main.ATLAS.stats()
+    results['pack'] = main.PACK.stats()
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Headless frame-time benchmark for every game mode.')
+    parser.add_argument('--frames', type=int, default=300, help='frames to render per mode')
+    parser.add_argument('--resolution', default='1920x1080', help='screen size as WIDTHxHEIGHT')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    width, height = map(int, args.resolution.lower().split('x'))
+    report = json.dumps(run_benchmark(args.frames, width, height), indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as output:
+            output.write(report + '\n')
+    else:
+        sys.stdout.write(report + '\n')
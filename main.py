@@ -1,5 +1,16 @@
+import argparse
 import contextlib
+import csv
+import hashlib
+import io
+import json
+import marshal
+import mmap
 import os
+import struct
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 
 with contextlib.redirect_stdout(None):
@@ -9,57 +20,757 @@ pygame.mixer.pre_init(22050, -16, 0, 16384)
 pygame.init()
 pygame.mixer.init()
 
-is_opened = False
-is_closed = True
-displayed_object = None
+INFO = pygame.display.Info()
+
+ASSET_CACHE_BUDGET = 64 * 1024 * 1024
+
+
+class AssetCache:
+    def __init__(self, budget: int = ASSET_CACHE_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.surfaces = OrderedDict()
+        self.fonts = {}
+        self.font_files = {}
+        self.layouts = {}
+
+    def image(self, path: str, size: tuple[int, int] = None, zoom: float = None, alpha=True):
+        key = (path, tuple(size) if size else None, zoom, alpha)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        if size or zoom is not None:
+            # only the scaled variant is kept, the source stays cached only if it is also drawn as is
+            surf = self.surfaces.get((path, None, None, alpha)) or self.decode(path, alpha)
+            if size:
+                surf = pygame.transform.scale(surf, size)
+            if zoom is not None:
+                # atlas entries may be stored smaller than the source, zoom is relative to the source size
+                surf = pygame.transform.rotozoom(surf, 0, zoom * ATLAS.scale(path))
+        else:
+            surf = self.decode(path, alpha)
+
+        self.surfaces[key] = surf
+        self.used += surface_bytes(surf)
+        self.evict(keep=key)
+        return surf
+
+    def decode(self, path: str, alpha: bool):
+        # downscaled atlas entries come back at their packed size, see ATLAS.scale
+        surf = ATLAS.image(path)
+        if surf is None:
+            surf = LOADER.take(path) or pygame.image.load(PACK.source(path), path)
+            return surf.convert_alpha() if alpha else surf.convert()
+        return surf if alpha else surf.convert()
+
+    def font(self, path: str, size: int):
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        data = self.font_files.get(path) or LOADER.take(path)
+        if data is not None:
+            self.font_files[path] = data
+            font = pygame.font.Font(io.BytesIO(data), size)
+        else:
+            # every size needs its own file object, the fonts read from it independently
+            font = pygame.font.Font(PACK.source(path), size)
+        self.fonts[key] = font
+        return font
+
+    def layout(self, path: str, size: int, text: str, width: int):
+        key = (path, size, text, width)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.hits += 1
+            return lines
+
+        self.misses += 1
+        lines = self.layouts[key] = wrap_text(self.font(path, size), text, width)
+        return lines
+
+    def text(self, path: str, size: int, text: str, color, background=None):
+        # rendered lines are shared by every info box and button and count against the same budget as images
+        key = ('text', path, size, text, color, background)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = self.font(path, size).render(text, True, color, background)
+        self.surfaces[key] = surf
+        self.used += surface_bytes(surf)
+        self.evict(keep=key)
+        return surf
+
+    def evict(self, keep=None):
+        while self.used > self.budget and len(self.surfaces) > 1:
+            key, surf = next(iter(self.surfaces.items()))
+            if key == keep:
+                break
+            del self.surfaces[key]
+            self.used -= surface_bytes(surf)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'surfaces': len(self.surfaces), 'fonts': len(self.fonts),
+                'layouts': len(self.layouts), 'used': self.used, 'budget': self.budget}
+
+
+def surface_bytes(surf: pygame.Surface):
+    # not the pitch, atlas subsurfaces share the pitch of the whole page
+    return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+class AssetLoader:
+    def __init__(self, workers: int = min(4, os.cpu_count() or 1)):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.pending = {}
+        # every future ever submitted, pending loses the ones already taken
+        self.futures = []
+
+    def preload(self, paths):
+        for path in paths:
+            if path not in self.pending:
+                future = self.pending[path] = self.executor.submit(decode_asset, path)
+                self.futures.append(future)
+
+    def take(self, path: str):
+        future = self.pending.pop(path, None)
+        return future.result() if future else None
+
+    def progress(self):
+        return sum(future.done() for future in self.futures) / len(self.futures) if self.futures else 1
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# runs on the worker threads, so it must not touch the display (no convert/convert_alpha)
+def decode_asset(path: str):
+    source = PACK.open(path)
+    if source is None:
+        with open(path, 'rb') as file:
+            source = io.BytesIO(file.read())
+    match os.path.splitext(path)[1].lower():
+        case '.png' | '.tga':
+            return pygame.image.load(source, path)
+    return source.read()
+
+
+ASSET_PACK = 'assets.pack'
+ASSET_PACK_MAGIC = b'BGNSPACK'
+ASSET_PACK_VERSION = 1
+ASSET_PACK_HEADER = struct.Struct('<8sII')
+ASSET_PACK_BUFFER = 64 * 1024
+
+
+class PackFile(io.RawIOBase):
+    # a read-only file over a slice of the mapped pack, reads copy straight from the mapping
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self.view = view
+        self.position = 0
+
+    def readable(self):
+        return True
 
-muted = False
+    def seekable(self):
+        return True
 
-INFO = pygame.display.Info()
+    def readinto(self, buffer):
+        data = self.view[self.position:self.position + len(buffer)]
+        memoryview(buffer).cast('B')[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: len(self.view)}[whence]
+        self.position = max(0, start + offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class AssetPack:
+    def __init__(self, path: str = ASSET_PACK):
+        self.path = path
+        self.index = {}
+        self.view = None
+        with contextlib.suppress(OSError, ValueError, struct.error):
+            self.load()
+
+    def load(self):
+        with open(self.path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = ASSET_PACK_HEADER.unpack_from(data)
+        if magic != ASSET_PACK_MAGIC or version != ASSET_PACK_VERSION:
+            return
+        start = ASSET_PACK_HEADER.size
+        base = start + size
+        self.index = {name: (base + offset, length)
+                      for name, (offset, length) in json.loads(data[start:base]).items()}
+        self.view = memoryview(data)
+
+    def slice(self, path: str):
+        entry = self.index.get(pack_name(path))
+        if entry is None:
+            return None
+        offset, length = entry
+        return self.view[offset:offset + length]
+
+    def open(self, path: str):
+        view = self.slice(path)
+        # decoders read a few bytes at a time, the C buffer keeps those reads out of Python
+        return io.BufferedReader(PackFile(view), ASSET_PACK_BUFFER) if view is not None else None
+
+    def source(self, path: str):
+        # what pygame loaders accept: a file over the pack, or the loose path when the pack lacks it
+        return self.open(path) or path
+
+    def read(self, path: str):
+        view = self.slice(path)
+        if view is None:
+            with open(path, 'rb') as file:
+                return file.read()
+        return bytes(view)
+
+    def stats(self):
+        return {'path': self.path if self.view is not None else None, 'entries': len(self.index),
+                'bytes': len(self.view) if self.view is not None else 0}
+
+
+def pack_name(path: str):
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+ATLAS_DIRECTORY = os.path.join('assets', 'atlas')
+ATLAS_MANIFEST = 'atlas.json'
+ATLAS_VERSION = 2
+
+
+class TextureAtlas:
+    def __init__(self, directory: str = ATLAS_DIRECTORY):
+        self.directory = directory
+        self.pages = []
+        self.page_sizes = []
+        self.entries = {}
+        self.loaded = {}
+        self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            manifest = json.loads(PACK.read(os.path.join(self.directory, ATLAS_MANIFEST)))
+        except (OSError, ValueError):
+            return
+        if manifest.get('version') != ATLAS_VERSION:
+            return
+        self.pages = [os.path.join(self.directory, page) for page in manifest['pages']]
+        self.page_sizes = manifest['page_sizes']
+        for path, entry in manifest['images'].items():
+            # a source edited after the atlas was built falls back to the loose file until it is rebuilt,
+            # a missing one means only the atlas was shipped (in the asset pack)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or [stat.st_size, stat.st_mtime_ns] == entry['source']:
+                self.entries[os.path.normpath(path)] = entry
+
+    def image(self, path: str):
+        entry = self.entries.get(os.path.normpath(path))
+        if entry is None:
+            return None
+        page = self.loaded.get(entry['page'])
+        if page is None:
+            page = self.loaded[entry['page']] = self.load_page(entry['page']).convert_alpha()
+        return page.subsurface(entry['rect'])
+
+    def load_page(self, index: int):
+        path = self.pages[index]
+        data = LOADER.take(path)
+        if path.endswith('.rgba'):
+            # raw pixels need no decoding, straight from the mapped pack when it has them
+            data = data or PACK.slice(path) or PACK.read(path)
+            return pygame.image.frombuffer(data, self.page_sizes[index], 'RGBA')
+        return data or pygame.image.load(PACK.source(path), path)
+
+    def scale(self, path: str):
+        entry = self.entries.get(os.path.normpath(path))
+        return entry['size'][0] / entry['rect'][2] if entry else 1
+
+    def startup_paths(self, paths):
+        # preload the pages that hold the packed images instead of the loose files
+        pages = [self.pages[self.entries[os.path.normpath(path)]['page']] for path in paths
+                 if os.path.normpath(path) in self.entries]
+        # raw pages inside the pack are mapped, not read, so there is nothing to do ahead of time
+        pages = [page for page in pages if not page.endswith('.rgba') or PACK.slice(page) is None]
+        return [path for path in paths if os.path.normpath(path) not in self.entries] + list(dict.fromkeys(pages))
+
+    def stats(self):
+        return {'entries': len(self.entries), 'pages': len(self.pages), 'pages_loaded': len(self.loaded),
+                'page_bytes': sum(surface_bytes(page) for page in self.loaded.values())}
+
+
+ASSETS = AssetCache()
+LOADER = AssetLoader()
+PACK = AssetPack()
+ATLAS = TextureAtlas()
+
+MUSIC_FADE = 1000
+
+
+AUDIO_CHANNELS = ('background', 'anthem')
+
+
+class AudioController:
+    def __init__(self):
+        self.muted = False
+        self.state = dict.fromkeys(AUDIO_CHANNELS)
+        self.track = None
+        self.volume = 1.0
+        self.queued = None
+        self.stream = None
+        self.switch_at = 0
+
+    def play(self, channel: str, track: str, volume: float = 1.0, loops: int = -1, fade_ms: int = MUSIC_FADE):
+        if self.muted or self.state[channel] == (track, volume, loops):
+            return
+        self.state[channel] = track, volume, loops
+        self.refresh(fade_ms)
+
+    def stop(self, channel: str = None):
+        channels = [channel] if channel else AUDIO_CHANNELS
+        for name in channels:
+            self.state[name] = None
+        if self.wanted() is None:
+            pygame.mixer.music.stop()
+            self.track = self.queued = None
+            self.switch_at = 0
+        else:
+            self.refresh(MUSIC_FADE)
+
+    def fadeout(self, channel: str, fade_ms: int):
+        self.state[channel] = None
+        self.refresh(fade_ms)
+
+    def mute(self):
+        self.stop()
+        self.muted = True
+
+    def playing(self, channel: str):
+        state = self.state[channel]
+        return state[0] if state else None
+
+    def is_playing(self, channel: str):
+        return self.state[channel] is not None and self.state[channel][0] == self.track
+
+    def wanted(self):
+        return self.state['anthem'] or self.state['background']
+
+    def refresh(self, fade_ms: int):
+        wanted = self.wanted()
+        if wanted is None:
+            if self.track is not None:
+                pygame.mixer.music.fadeout(fade_ms)
+                self.switch_at = pygame.time.get_ticks() + fade_ms
+            self.track = self.queued = None
+            return
+
+        track, volume, loops = wanted
+        if track == self.track:
+            self.queued = None
+            if volume != self.volume:
+                self.volume = volume
+                pygame.mixer.music.set_volume(volume)
+            return
+        # a single stream cannot overlap two tracks, so crossfade by fading out before fading the next one in
+        if self.track is not None and fade_ms:
+            pygame.mixer.music.fadeout(fade_ms)
+            self.track = None
+            self.switch_at = pygame.time.get_ticks() + fade_ms
+        if fade_ms and pygame.time.get_ticks() < self.switch_at and pygame.mixer.music.get_busy():
+            self.queued = track, volume, loops, fade_ms
+            return
+        self.start(track, volume, loops, fade_ms)
+
+    def start(self, track: str, volume: float, loops: int, fade_ms: int):
+        # the music is streamed and decoded while it plays, so loading a track costs no decode up front;
+        # keep the pack file open for as long as it plays
+        self.stream = PACK.open(track)
+        if self.stream is None:
+            pygame.mixer.music.load(track)
+        else:
+            pygame.mixer.music.load(self.stream, os.path.splitext(track)[1][1:])
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops, fade_ms=fade_ms)
+        self.track, self.volume, self.queued = track, volume, None
+
+    def update(self):
+        if self.queued is not None and (not pygame.mixer.music.get_busy()
+                                        or pygame.time.get_ticks() >= self.switch_at):
+            self.start(*self.queued)
+
+
+AUDIO = AudioController()
+
+PROFILE_PHASES = ('wait', 'events', 'update', 'draw', 'interact', 'overlay', 'display')
+
+
+class FrameProfiler:
+    def __init__(self, size: int = 240):
+        self.frames = deque(maxlen=size)
+        self.current = {}
+        self.last = time.perf_counter()
+        self.visible = False
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0) + (now - self.last) * 1000
+        self.last = now
+
+    def next_frame(self):
+        if any(phase != 'wait' for phase in self.current):
+            self.current['frame'] = sum(ms for phase, ms in self.current.items() if phase != 'wait')
+            self.frames.append(self.current)
+        self.current = {}
+        self.last = time.perf_counter()
+
+    def slowest_phase(self):
+        totals = {phase: sum(frame.get(phase, 0) for frame in self.frames) for phase in PROFILE_PHASES[1:]}
+        phase = max(totals, key=totals.get)
+        return phase, totals[phase] / max(len(self.frames), 1)
+
+    def draw(self, screen: pygame.Surface):
+        width, height, budget = self.frames.maxlen, 100, 1000 / 60
+        overlay = pygame.Surface((width + 20, height + 60), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for x, frame in enumerate(self.frames):
+            bar = min(frame['frame'] / (budget * 2), 1) * height
+            color = '#B69945' if frame['frame'] <= budget else '#C0392B'
+            pygame.draw.line(overlay, color, (x + 10, height + 10), (x + 10, height + 10 - bar))
+        pygame.draw.line(overlay, '#FFFFFF', (10, height // 2 + 10), (width + 10, height // 2 + 10))
+
+        font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-Bold.ttf'), 14)
+        last = self.frames[-1]['frame'] if self.frames else 0
+        phase, average = self.slowest_phase()
+        overlay.blit(font.render(f'frame {last:.1f} ms', True, '#FFFFFF'), (10, height + 15))
+        overlay.blit(font.render(f'slowest {phase} {average:.1f} ms', True, '#FFFFFF'), (10, height + 35))
+        return screen.blit(overlay, overlay.get_rect(topright=(screen.get_width() - 10, 10)))
+
+    def dump_csv(self, path: str):
+        with open(path, 'w', newline='', encoding='utf8') as file:
+            writer = csv.DictWriter(file, fieldnames=('frame',) + PROFILE_PHASES, restval=0)
+            writer.writeheader()
+            writer.writerows(self.frames)
+
+
+PROFILER = FrameProfiler()
+
+
+class DirtyRenderer:
+    def __init__(self):
+        self.rects = []
+        self.previous = []
+        self.partial = False
+        self.full = True
+        self.scaled = False
+
+    def use_dirty_rects(self):
+        self.partial = True
+
+    def add(self, rect: pygame.Rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        self.full = True
+
+    def present(self):
+        # a SCALED window is presented through a renderer, which always flips the whole frame
+        if self.partial and not self.full and not self.scaled:
+            # what was drawn last frame has to be refreshed as well, so moved or closed things get erased
+            pygame.display.update(self.rects + self.previous)
+        else:
+            pygame.display.update()
+        self.previous = self.rects
+        self.rects = []
+        self.partial = self.full = False
+
+
+RENDERER = DirtyRenderer()
+
+TICK_RATE = 60
+FRAME_RATE = 60
+MAX_TICKS_PER_FRAME = 5
+
+
+class FixedTimestep:
+    def __init__(self, rate: int = TICK_RATE, max_ticks: int = MAX_TICKS_PER_FRAME):
+        self.step = 1 / rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last = time.perf_counter()
+
+    def advance(self):
+        now = time.perf_counter()
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator / self.step)
+        if ticks > self.max_ticks:
+            # too far behind to catch up, drop the backlog instead of stalling the next frames
+            ticks, self.accumulator = self.max_ticks, 0.0
+        else:
+            self.accumulator -= ticks * self.step
+        return ticks
+
+    def alpha(self):
+        return self.accumulator / self.step
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.last = time.perf_counter()
+
+
+TIMESTEP = FixedTimestep()
+
+FADE_DURATION = 1200
+FADE_HOLD = 0.05
+
+
+class Transition:
+    def __init__(self, duration: int = FADE_DURATION):
+        self.duration = duration
+        self.snapshot = None
+        self.overlay = None
+        self.fade_in = False
+        self.then = None
+        self.started_at = 0
+
+    @property
+    def active(self):
+        return self.snapshot is not None
+
+    def start(self, screen: pygame.Surface, fade_in=False, then: Callable = None, color='#000000'):
+        # the scene is captured once and only the overlay alpha changes afterwards
+        self.snapshot = screen.copy()
+        if self.overlay is None or self.overlay.get_size() != screen.get_size():
+            self.overlay = pygame.Surface(screen.get_size())
+        self.overlay.fill(color)
+        self.fade_in, self.then = fade_in, then
+        self.started_at = pygame.time.get_ticks()
+
+    def draw(self, screen: pygame.Surface):
+        elapsed = pygame.time.get_ticks() - self.started_at
+        progress = min(elapsed / self.duration, 1)
+        if self.fade_in:
+            progress = 1 - progress
+        # stays fully covered for a moment at the dark end, like the old 270 step fade did
+        self.overlay.set_alpha(round(255 * min(progress / (1 - FADE_HOLD), 1)))
+        screen.blit(self.snapshot, (0, 0))
+        screen.blit(self.overlay, (0, 0))
+        RENDERER.invalidate()
+        if elapsed >= self.duration:
+            then, self.snapshot, self.then = self.then, None, None
+            if then:
+                then()
+
+
+TRANSITION = Transition()
+
+
+def ease_in_out(progress: float):
+    return progress * progress * (3 - 2 * progress)
+
+
+class Tween:
+    def __init__(self, target, attribute: str, end: float, duration: int, easing: Callable, then: Callable):
+        self.target, self.attribute = target, attribute
+        self.start, self.end = getattr(target, attribute), end
+        self.duration = duration
+        self.easing = easing
+        self.then = then
+        self.started_at = pygame.time.get_ticks()
+
+    def update(self, now: int):
+        progress = min((now - self.started_at) / self.duration, 1) if self.duration else 1
+        value = self.start + (self.end - self.start) * self.easing(progress)
+        setattr(self.target, self.attribute, round(value))
+        return progress >= 1
+
+
+class TweenScheduler:
+    def __init__(self):
+        self.tweens = []
+
+    @property
+    def active(self):
+        return bool(self.tweens)
+
+    def add(self, target, attribute: str, end: float, duration: int, easing: Callable = ease_in_out,
+            then: Callable = None):
+        tween = Tween(target, attribute, end, duration, easing, then)
+        self.tweens.append(tween)
+        return tween
+
+    def update(self):
+        now = pygame.time.get_ticks()
+        finished = [tween for tween in self.tweens if tween.update(now)]
+        self.tweens = [tween for tween in self.tweens if tween not in finished]
+        for tween in finished:
+            if tween.then:
+                tween.then()
+
+
+TWEENS = TweenScheduler()
+
+# every position in the layout is written for this canvas
+RENDER_RESOLUTION = 1920, 1080
+
+STATIC_MODES = ('title_screen', 'credit_screen', 'game_menu', 'victory_screen')
+IDLE_TIMEOUT = 500
+CREDITS_INTERVAL = 7000
+CREDITS_SLIDE = 1600
+
+
+ACTIONS = {'left': (pygame.K_LEFT, pygame.K_a), 'right': (pygame.K_RIGHT, pygame.K_d),
+           'jump': (pygame.K_SPACE, pygame.K_w, pygame.K_UP), 'interact': (pygame.K_e, pygame.K_RCTRL),
+           'pause': (pygame.K_p,), 'mute': (pygame.K_m,)}
+
+
+class InputState:
+    def __init__(self):
+        self.held = frozenset()
+        self.previous = frozenset()
+        self.mouse_position = (0, 0)
+
+    def sample(self):
+        keys = pygame.key.get_pressed()
+        held = {action for action, bound in ACTIONS.items() if any(keys[key] for key in bound)}
+        if pygame.mouse.get_pressed()[0]:
+            held.add('click')
+        self.previous, self.held = self.held, frozenset(held)
+        self.mouse_position = pygame.mouse.get_pos()
+
+    def is_held(self, action: str):
+        return action in self.held
+
+    def pressed(self, action: str):
+        return action in self.held and action not in self.previous
+
+    def released(self, action: str):
+        return action in self.previous and action not in self.held
+
+    def reset(self):
+        self.held = self.previous = frozenset()
+
+
+INPUT = InputState()
+
+
+def wait_for_events(deadlines: list):
+    # sleeps until there is input or the nearest scheduled change, whichever comes first
+    now = pygame.time.get_ticks()
+    timeout = min([IDLE_TIMEOUT] + [deadline - now for deadline in deadlines if deadline > now])
+    event = pygame.event.wait(max(timeout, 1))
+    return [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+
+
+STARTUP_ASSETS = [os.path.join('assets', 'fonts', f'{name}.ttf') for name in
+                  ('NotoSerif-BoldItalic', 'NotoSerif-Italic', 'NotoSerif-Bold')] + \
+                 [os.path.join('assets', 'gallery', f'{name}.png') for name in
+                  ('title_screen_logo', 'player', 'uprising_house', 'tsar_house', 'communist_house', 'door',
+                   'victory_door', 'python_logo', 'pygame_logo', 'vscode_logo', 'bgherald_logo', 'book',
+                   'pixilart_logo', 'gimp_logo', 'fl_studio_logo', 'dimitrov_coat_of_arms', '1879-1881_coat_of_arms',
+                   'ferdinant_coat_of_arms', 'boris3_coat_of_arms', 'alexander_coat_of_arms', 'zhivkov_coat_of_arms',
+                   'f_cup', 's_cup')]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    def cells_for(self, rect: pygame.Rect):
+        for x in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+            for y in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+                yield x, y
+
+    def insert(self, rect: pygame.Rect, item):
+        for cell in self.cells_for(rect):
+            self.cells[cell].append((rect, item))
+
+    def query(self, rect: pygame.Rect):
+        found, seen = [], set()
+        for cell in self.cells_for(rect):
+            for other, item in self.cells.get(cell, ()):
+                if id(item) not in seen and other.colliderect(rect):
+                    seen.add(id(item))
+                    found.append(item)
+        return found
 
 
 class Player:
     def __init__(self, screen_width, screen_height):
         self.screen_width, self.screen_height = screen_width, screen_height
 
-        player = pygame.image.load(os.path.join('assets', 'gallery', 'player.png')).convert_alpha()
-        player = pygame.transform.scale(player, (40, 62))
+        player = ASSETS.image(os.path.join('assets', 'gallery', 'player.png'), size=(40, 62))
         self.gravity = 1
         self.image = player
-        self.map_ground = init_platform(self.screen_width, 160, 0, INFO.current_h - 160, '#394521')
-        self.mask = pygame.mask.from_surface(self.image)
-        self.rect = self.image.get_rect(midbottom=(50, self.map_ground[2].y))
+        self.map_ground = init_platform(self.screen_width, 160, 0, self.screen_height - 160, '#394521')
+        self.rect = self.image.get_rect(midbottom=(50, self.map_ground[1].y))
         self.direction = pygame.math.Vector2()
         self.speed = 5
         self.jump_speed = 20
         self.is_on_floor = False
+        self.previous_position = self.stepped_position = self.rect.topleft
+        self.alpha = 1.0
+
+    @property
+    def draw_rect(self):
+        if self.rect.topleft != self.stepped_position:
+            # moved outside the simulation (entering a room, a reset), nothing to interpolate from
+            return self.rect
+        (previous_x, previous_y), (x, y) = self.previous_position, self.stepped_position
+        return self.rect.move(round((previous_x - x) * (1 - self.alpha)), round((previous_y - y) * (1 - self.alpha)))
+
+    def step(self, update: Callable, *args):
+        self.previous_position = self.rect.topleft
+        update(*args)
+        self.stepped_position = self.rect.topleft
 
     def apply_gravity(self):
         self.direction.y += self.gravity
-        self.rect.y += self.direction.y
-
-    def platform_collision(self, platforms):
-        for _, mask, rect in platforms:
-            offset_x, offset_y = rect.x - self.rect.x, rect.y - self.rect.y
-            intersection_point = self.mask.overlap(mask, (offset_x, offset_y))
-            if intersection_point:
-                if self.direction.y > 0:
-                    self.rect.bottom = rect.top
-                    if (self.rect.bottom != intersection_point[1] + self.rect.y + 1) and (
-                            self.mask.overlap_area(mask, (offset_x, offset_y)) in (12, 16, 25)):
-                        self.rect.x += 15
-                    self.direction.y = 0
-                    self.is_on_floor = True
-                elif self.direction.y < 0:
-                    self.rect.top = rect.bottom
-                    self.direction.y = 1
-
-        if self.is_on_floor and self.direction.y != 0:
-            self.is_on_floor = False
-
-    def user_left_right(self, pressed_keys):
-        move_left = pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]
-        move_right = pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]
+
+    def platform_collision(self, platforms: SpatialGrid):
+        step_x, step_y = int(self.direction.x * self.speed), int(self.direction.y)
+        self.rect.x += sweep(self.rect, step_x, 0, platforms)[0]
+        moved_y = sweep(self.rect, 0, step_y, platforms)[1]
+        self.rect.y += moved_y
+
+        self.is_on_floor = False
+        if moved_y != step_y:
+            if step_y > 0:
+                self.direction.y = 0
+                self.is_on_floor = True
+            else:
+                self.direction.y = 1
+
+    def user_left_right(self):
+        move_left, move_right = INPUT.is_held('left'), INPUT.is_held('right')
 
         if move_right and self.rect.right <= self.screen_width:
             self.direction.x = 1
@@ -68,10 +779,9 @@ class Player:
         else:
             self.direction.x = 0
 
-    def user_jumping(self, pressed_keys):
-        move_left = pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]
-        move_right = pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]
-        jump = pressed_keys[pygame.K_SPACE] or pressed_keys[pygame.K_w] or pressed_keys[pygame.K_UP]
+    def user_jumping(self):
+        move_left, move_right = INPUT.is_held('left'), INPUT.is_held('right')
+        jump = INPUT.is_held('jump')
 
         if move_right and self.rect.right <= self.screen_width:
             self.direction.x = 1
@@ -83,14 +793,13 @@ class Player:
         if jump and self.is_on_floor:
             self.direction.y = -self.jump_speed
 
-    def room_update(self, platforms):
-        self.user_jumping(pygame.key.get_pressed())
-        self.rect.x += self.direction.x * self.speed
+    def room_update(self, platforms: SpatialGrid):
+        self.user_jumping()
         self.apply_gravity()
         self.platform_collision(platforms)
 
     def map_update(self):
-        self.user_left_right(pygame.key.get_pressed())
+        self.user_left_right()
         self.rect.x += self.direction.x * self.speed
 
 
@@ -99,434 +808,279 @@ class Levels:
         self.screen_width = screen_width
         self.screen_height = screen_height
 
-        self.door_surf, self.door_rect = init_room_objects((67, 97), 100, player.map_ground[2].y, 'door')
+        self.door_surf, self.door_rect = init_room_objects((67, 97), 100, player.map_ground[1].y, 'door')
         self.victory_door_surf, self.victory_door_rect = init_room_objects((67, 97), screen_width - 100,
-                                                                           player.map_ground[2].y, 'victory_door')
-        self.level_1_build(screen, screen_width, screen_height, player)
-        self.level_2_build(screen, screen_width, screen_height, player)
-        self.level_3_build(screen, screen_width, screen_height, player)
-
-    def level_1(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player, mode: str,
-                colliding: bool, first_time: bool, uprising_house_rect: pygame.Rect):
-        if not colliding:
-            player.room_update(self.uprising_platforms)
-
-        if not muted:
-            self.uprising_music.play(loops=-1)
-            self.uprising_music.set_volume(0.05)
-        self.level_1_draw(screen, player)
+                                                                           player.map_ground[1].y, 'victory_door')
+        # rooms are built on first entry, see build()
+        self.rooms = {}
+
+    def build(self, level: int, screen: pygame.Surface, player: Player):
+        if level in self.rooms:
+            return
+        draw_loading(screen, self.screen_width, self.screen_height)
+        self.rooms[level] = self.build_room(load_room(ROOMS[level - 1]), screen, player)
+
+    def build_room(self, room: dict, screen: pygame.Surface, player: Player):
+        # positions in room files are measured from the bottom right corner of the screen
+        width, height = self.screen_width, self.screen_height
+        platforms = [init_platform(platform_width, platform_height, width - right, height - bottom)
+                     for platform_width, platform_height, right, bottom in room['platforms']]
+        platforms += [init_platform(width, 160, 0, height - 160, room['ground']), init_platform(width, 1, 0, -2)]
+
+        sprites, rects = [], {}
+        for key, symbol, variety, size, (right, bottom) in room['objects']:
+            surf, rects[key] = init_symbol(symbol, variety, size, width - right, height - bottom)
+            sprites.append((surf, rects[key]))
+
+        # only descriptors here, the boxes are rendered the first time they are opened, see InfoBoxCache
+        infoboxes = {key: InfoBoxDescriptor(screen, width, height, player, rects[anchor], thing, dict(options))
+                     for key, anchor, thing, options in room['infoboxes']}
+
+        return Room(room['music'], room['volume'], platforms, sprites, rects, infoboxes, room['victory_door'])
+
+    def bake_background(self, sprites: list, platforms: list, doors: list = None):
+        background = pygame.Surface((self.screen_width, self.screen_height)).convert()
+        background.fill('#BAAB98')
+        for surf, rect in sprites:
+            background.blit(surf, rect)
+        for surf, rect in platforms:
+            background.blit(surf, rect)
+        for surf, rect in doors or [(self.door_surf, self.door_rect)]:
+            background.blit(surf, rect)
+        return background
+
+    def room(self, level: int, screen: pygame.Surface, player: Player, mode: str, first_time: bool,
+             house_rect: pygame.Rect, victory: bool = False):
+        room = self.rooms[level]
+        AUDIO.play('background', room.music, volume=room.volume)
+        PROFILER.lap('update')
+        self.room_draw(level, screen, player, victory)
+        RENDERER.use_dirty_rects()
+        RENDERER.add(player.draw_rect)
+        PROFILER.lap('draw')
         if enter_room(player.rect, self.door_rect):
-            self.uprising_music.fadeout(2700)
-            fade(screen, screen_width, screen_height, lambda: self.level_1_draw(screen, player))
+            AUDIO.fadeout('background', 2700)
+            fade(screen, lambda: self.room_draw(level, screen, player, victory))
             first_time = True
-            player.rect.x, player.rect.y = uprising_house_rect.center[0], player.map_ground[2].y - player.rect.height
-            player.rect.y = player.map_ground[2].y - player.rect.height
+            player.rect.x, player.rect.y = house_rect.center[0], player.map_ground[1].y - player.rect.height
             mode = 'map'
-        colliding = (interact(screen, player.rect, self.uprising_coat_of_arms_rect_1, self.uprising_infoboxes,
-                              'coat_of_arms_1')
-                     or interact(screen, player.rect, self.uprising_coat_of_arms_rect_2, self.uprising_infoboxes,
-                                 'coat_of_arms_2')
-                     or interact(screen, player.rect, self.uprising_flag_rect_1, self.uprising_infoboxes, 'flag_1')
-                     or interact(screen, player.rect, self.uprising_flag_rect_2, self.uprising_infoboxes, 'flag_2')
-                     or interact(screen, player.rect, self.uprising_flag_rect_3, self.uprising_infoboxes, 'flag_3')
-                     or interact(screen, player.rect, self.uprising_question_rect_1, self.uprising_infoboxes,
-                                 'question_1')
-                     or interact(screen, player.rect, self.uprising_question_rect_2, self.uprising_infoboxes,
-                                 'question_2')
-                     or interact(screen, player.rect, self.uprising_question_rect_3, self.uprising_infoboxes,
-                                 'question_3'))
-        return mode, colliding, first_time
-
-    def level_1_build(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player):
-        self.uprising_music = pygame.mixer.Sound(os.path.join('assets', 'music', 'uprising_music.mp3'))
-        self.uprising_info = None
-        with open('assets/info/uprising_info.txt', encoding="utf8") as info:
-            self.uprising_info = info.readlines()
-        self.uprising_platforms = [init_platform(80, 10, self.screen_width - 1240, self.screen_height - 270),
-                                   init_platform(100, 10, self.screen_width - 1430, self.screen_height - 675),
-                                   init_platform(100, 10, self.screen_width - 1795, self.screen_height - 380),
-                                   init_platform(100, 10, self.screen_width - 1695, self.screen_height - 570),
-                                   init_platform(100, 10, self.screen_width - 575, self.screen_height - 600),
-                                   init_platform(100, 10, self.screen_width - 780, self.screen_height - 410),
-                                   init_platform(100, 10, self.screen_width - 1170, self.screen_height - 505),
-                                   init_platform(100, 10, self.screen_width - 1470, self.screen_height - 405),
-                                   init_platform(100, 10, self.screen_width - 970, self.screen_height - 705),
-                                   init_platform(screen_width, 160, 0, INFO.current_h - 160, '#043619'),
-                                   init_platform(screen_width, 1, 0, -2)]
-        self.uprising_coat_of_arms_surf_1, self.uprising_coat_of_arms_rect_1 = init_symbol('coat_of_arms',
-                                                                                           'uprising_icon', (42, 54),
-                                                                                           self.screen_width - 1670,
-                                                                                           self.screen_height - 630)
-        self.uprising_coat_of_arms_surf_2, self.uprising_coat_of_arms_rect_2 = init_symbol('coat_of_arms',
-                                                                                           'uprising_icon', (42, 54),
-                                                                                           self.screen_width - 540,
-                                                                                           self.screen_height - 660)
-        self.uprising_flag_surf_1, self.uprising_flag_rect_1 = init_symbol('flag', 'uprising_icon', (54, 61),
-                                                                           self.screen_width - 1770,
-                                                                           self.screen_height - 445)
-        self.uprising_flag_surf_2, self.uprising_flag_rect_2 = init_symbol('flag', 'uprising_icon', (54, 61),
-                                                                           self.screen_width - 1390,
-                                                                           self.screen_height - 740)
-        self.uprising_flag_surf_3, self.uprising_flag_rect_3 = init_symbol('flag', 'uprising_icon', (54, 61),
-                                                                           self.screen_width - 745,
-                                                                           self.screen_height - 480)
-        self.uprising_question_surf_1, self.uprising_question_rect_1 = init_symbol('question', 'icon', (48, 87),
-                                                                                   self.screen_width - 1145,
-                                                                                   self.screen_height - 595)
-        self.uprising_question_surf_2, self.uprising_question_rect_2 = init_symbol('question', 'icon', (48, 87),
-                                                                                   self.screen_width - 1445,
-                                                                                   self.screen_height - 495)
-        self.uprising_question_surf_3, self.uprising_question_rect_3 = init_symbol('question', 'icon', (48, 87),
-                                                                                   self.screen_width - 945,
-                                                                                   self.screen_height - 795)
-        self.uprising_infoboxes = {
-            'coat_of_arms_1': InfoBox(screen, screen_width, screen_height, player, self.uprising_coat_of_arms_rect_1,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='vitezovic', size=(194, 289),
-                                                        x=15, y=15), message=self.uprising_info[0].strip('\n')),
-            'coat_of_arms_2': InfoBox(screen, screen_width, screen_height, player, self.uprising_coat_of_arms_rect_2,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='zefarovic', size=(277, 357),
-                                                        x=15, y=15), message=self.uprising_info[1].strip('\n')),
-            'flag_1': InfoBox(screen, screen_width, screen_height, player, self.uprising_flag_rect_1,
-                              thing=init_symbol(symbol='flag', variety='green_uprising', size=(320, 192), x=15, y=15),
-                              message=self.uprising_info[2].strip('\n')),
-            'flag_2': InfoBox(screen, screen_width, screen_height, player, self.uprising_flag_rect_2,
-                              thing=init_symbol(symbol='flag', variety='red_uprising', size=(310, 297), x=15, y=15),
-                              message=self.uprising_info[3].strip('\n')),
-            'flag_3': InfoBox(screen, screen_width, screen_height, player, self.uprising_flag_rect_3,
-                              thing=init_symbol(symbol='flag', variety='tricolour_uprising', size=(319, 251),
-                                                x=15, y=15),
-                              message=self.uprising_info[4].strip('\n')),
-            'question_1': InfoBox(screen, screen_width, screen_height, player, self.uprising_question_rect_1,
-                                  thing=init_symbol(symbol='coat_of_arms', variety='zefarovic', size=(185, 238),
-                                                    x=15, y=15),
-                                  category='question', message=self.uprising_info[5].strip('\n'),
-                                  answers=['A) Павел Ритер-Витезович', 'Б) Христофор Жефарович',
-                                           'В) Паисий Хилендарски'], correct_answer=2),
-            'question_2': InfoBox(screen, screen_width, screen_height, player, self.uprising_question_rect_2,
-                                  thing=init_symbol(symbol='flag', variety='levski', size=(279, 169), x=15, y=15),
-                                  category='question', message=self.uprising_info[6].strip('\n'),
-                                  answers=['А) Христо Ботев', 'Б) Георги С. Раковски', 'В) Васил Левски'],
-                                  correct_answer=3),
-            'question_3': InfoBox(screen, screen_width, screen_height, player, self.uprising_question_rect_2,
-                                  thing=init_symbol(symbol='flag', variety='rakovski', size=(359, 274), x=15, y=15),
-                                  category='question', message=self.uprising_info[7].strip('\n'),
-                                  answers=['А) Одески', 'Б) Белградски', 'В) Букурещки'], correct_answer=1)}
-
-    def level_1_draw(self, screen: pygame.Surface, player: Player):
-        screen.fill('#BAAB98')
-        screen.blit(self.uprising_coat_of_arms_surf_1, self.uprising_coat_of_arms_rect_1)
-        screen.blit(self.uprising_coat_of_arms_surf_2, self.uprising_coat_of_arms_rect_2)
-        screen.blit(self.uprising_flag_surf_1, self.uprising_flag_rect_1)
-        screen.blit(self.uprising_flag_surf_2, self.uprising_flag_rect_2)
-        screen.blit(self.uprising_flag_surf_3, self.uprising_flag_rect_3)
-        screen.blit(self.uprising_question_surf_1, self.uprising_question_rect_1)
-        screen.blit(self.uprising_question_surf_2, self.uprising_question_rect_2)
-        screen.blit(self.uprising_question_surf_3, self.uprising_question_rect_3)
-        for platform in self.uprising_platforms:
-            screen.blit(platform[0], platform[2])
-        screen.blit(self.door_surf, self.door_rect)
-        screen.blit(player.image, player.rect)
-
-    def level_2(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player, mode: str,
-                colliding: bool, first_time: bool, tsar_house_rect: pygame.Rect):
-        if not colliding:
-            player.room_update(self.tsar_platforms)
-        if not muted:
-            self.tsar_music.play(loops=-1)
-            self.tsar_music.set_volume(0.05)
-        self.level_2_draw(screen, player)
-        if enter_room(player.rect, self.door_rect):
-            self.tsar_music.fadeout(2700)
-            fade(screen, screen_width, screen_height, lambda: self.level_2_draw(screen, player))
+        if room.victory_door and enter_room(player.rect, self.victory_door_rect):
+            AUDIO.fadeout('background', 2700)
+            fade(screen, lambda: self.room_draw(level, screen, player, victory))
             first_time = True
-            player.rect.x, player.rect.y = tsar_house_rect.center[0], player.map_ground[2].y - player.rect.height
-            mode = 'map'
-        colliding = (interact(screen, player.rect, self.tsar_coat_of_arms_rect_1, self.tsar_infoboxes, 'coat_of_arms_1')
-                     or interact(screen, player.rect, self.tsar_coat_of_arms_rect_2, self.tsar_infoboxes,
-                                 'coat_of_arms_2')
-                     or interact(screen, player.rect, self.tsar_coat_of_arms_rect_3, self.tsar_infoboxes,
-                                 'coat_of_arms_3')
-                     or interact(screen, player.rect, self.tsar_coat_of_arms_rect_4, self.tsar_infoboxes,
-                                 'coat_of_arms_4')
-                     or interact(screen, player.rect, self.tsar_flag_rect_1, self.tsar_infoboxes, 'flag_1')
-                     or interact(screen, player.rect, self.tsar_anthem_rect_1, self.tsar_infoboxes, 'anthem_1')
-                     or interact(screen, player.rect, self.tsar_anthem_rect_2, self.tsar_infoboxes, 'anthem_2')
-                     or interact(screen, player.rect, self.tsar_question_rect_1, self.tsar_infoboxes, 'question_1')
-                     or interact(screen, player.rect, self.tsar_question_rect_2, self.tsar_infoboxes, 'question_2')
-                     or interact(screen, player.rect, self.tsar_question_rect_3, self.tsar_infoboxes, 'question_3'))
-        return mode, colliding, first_time
-
-    def level_2_build(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player):
-        self.tsar_music = pygame.mixer.Sound(os.path.join('assets', 'music', 'tsar_music.mp3'))
-        self.tsar_info = None
-        with open('assets/info/tsar_info.txt', encoding="utf8") as info:
-            self.tsar_info = info.readlines()
-        self.tsar_platforms = [init_platform(100, 10, self.screen_width - 1160, self.screen_height - 270),
-                               init_platform(100, 10, self.screen_width - 1585, self.screen_height - 510),
-                               init_platform(70, 10, self.screen_width - 1370, self.screen_height - 380),
-                               init_platform(100, 10, self.screen_width - 690, self.screen_height - 510),
-                               init_platform(70, 10, self.screen_width - 870, self.screen_height - 380),
-                               init_platform(100, 10, self.screen_width - 1800, self.screen_height - 670),
-                               init_platform(100, 10, self.screen_width - 1400, self.screen_height - 670),
-                               init_platform(100, 10, self.screen_width - 900, self.screen_height - 670),
-                               init_platform(100, 10, self.screen_width - 500, self.screen_height - 670),
-                               init_platform(100, 10, self.screen_width - 1595, self.screen_height - 730),
-                               init_platform(100, 10, self.screen_width - 695, self.screen_height - 730),
-                               init_platform(100, 10, self.screen_width - 1160, self.screen_height - 580),
-                               init_platform(screen_width, 160, 0, INFO.current_h - 160, '#947E01'),
-                               init_platform(screen_width, 1, 0, -2)]
-        self.tsar_coat_of_arms_surf_1, self.tsar_coat_of_arms_rect_1 = init_symbol('coat_of_arms', 'tsar_icon',
-                                                                                   (42, 54), self.screen_width - 1770,
-                                                                                   self.screen_height - 730)
-        self.tsar_coat_of_arms_surf_2, self.tsar_coat_of_arms_rect_2 = init_symbol('coat_of_arms', 'tsar_icon',
-                                                                                   (42, 54), self.screen_width - 1370,
-                                                                                   self.screen_height - 730)
-        self.tsar_coat_of_arms_surf_3, self.tsar_coat_of_arms_rect_3 = init_symbol('coat_of_arms', 'tsar_icon',
-                                                                                   (42, 54), self.screen_width - 870,
-                                                                                   self.screen_height - 730)
-        self.tsar_coat_of_arms_surf_4, self.tsar_coat_of_arms_rect_4 = init_symbol('coat_of_arms', 'tsar_icon',
-                                                                                   (42, 54), self.screen_width - 470,
-                                                                                   self.screen_height - 730)
-        self.tsar_flag_surf_1, self.tsar_flag_rect_1 = init_symbol('flag', 'tsar_icon', (54, 61),
-                                                                   self.screen_width - 1120, self.screen_height - 335)
-        self.tsar_anthem_surf_1, self.tsar_anthem_rect_1 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                       self.screen_width - 1570,
-                                                                       self.screen_height - 580)
-        self.tsar_anthem_surf_2, self.tsar_anthem_rect_2 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                       self.screen_width - 670,
-                                                                       self.screen_height - 580)
-        self.tsar_question_surf_1, self.tsar_question_rect_1 = init_symbol('question', 'icon', (48, 87),
-                                                                           self.screen_width - 1570,
-                                                                           self.screen_height - 820)
-        self.tsar_question_surf_2, self.tsar_question_rect_2 = init_symbol('question', 'icon', (48, 87),
-                                                                           self.screen_width - 670,
-                                                                           self.screen_height - 820)
-        self.tsar_question_surf_3, self.tsar_question_rect_3 = init_symbol('question', 'icon', (48, 87),
-                                                                           self.screen_width - 1135,
-                                                                           self.screen_height - 670)
-        self.tsar_infoboxes = {
-            'coat_of_arms_1': InfoBox(screen, screen_width, screen_height, player, self.tsar_coat_of_arms_rect_1,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='1879-1881', size=(),
-                                                        x=15, y=15),
-                                      message=self.tsar_info[0].strip('\n')),
-            'coat_of_arms_2': InfoBox(screen, screen_width, screen_height, player, self.tsar_coat_of_arms_rect_2,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='alexander', size=(),
-                                                        x=15, y=15),
-                                      message=self.tsar_info[1].strip('\n')),
-            'coat_of_arms_3': InfoBox(screen, screen_width, screen_height, player, self.tsar_coat_of_arms_rect_3,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='ferdinant', size=(),
-                                                        x=15, y=15),
-                                      message=self.tsar_info[2].strip('\n')),
-            'coat_of_arms_4': InfoBox(screen, screen_width, screen_height, player, self.tsar_coat_of_arms_rect_4,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='boris3', size=(), x=15, y=15),
-                                      message=self.tsar_info[3].strip('\n')),
-            'flag_1': InfoBox(screen, screen_width, screen_height, player, self.tsar_flag_rect_1,
-                              thing=init_symbol(symbol='flag', variety='base_tricolour', size=(384, 231), x=15, y=15),
-                              message=self.tsar_info[4].strip('\n')),
-            'anthem_1': InfoBox(screen, screen_width, screen_height, player, self.tsar_anthem_rect_1,
-                                thing=init_symbol(symbol='portrait', variety='petko_slaveikov', size=(263, 364), x=15,
-                                                  y=15), message=self.tsar_info[5].strip('\n')),
-            'anthem_2': InfoBox(screen, screen_width, screen_height, player, self.tsar_anthem_rect_2,
-                                thing=init_symbol(symbol='portrait', variety='ivan_vazov', size=(263, 397), x=15, y=15),
-                                message=self.tsar_info[6].strip('\n')),
-            'question_1': InfoBox(screen, screen_width, screen_height, player, self.tsar_question_rect_1,
-                                  thing=init_symbol(symbol='coat_of_arms', variety='ferdinant', size=(), x=15, y=15),
-                                  category='question', message=self.tsar_info[7].strip('\n'),
-                                  answers=['A) Александър I Български', 'Б) Борис III', 'В) Фердинанд I Български'],
-                                  correct_answer=3),
-            'question_2': InfoBox(screen, screen_width, screen_height, player, self.tsar_question_rect_2,
-                                  thing=init_symbol(symbol='coat_of_arms', variety='alexander', size=(), x=15, y=15),
-                                  category='question', message=self.tsar_info[8].strip('\n'),
-                                  answers=['А) Борис III', 'Б) Александър I Български', 'В) Фердинанд I Български'],
-                                  correct_answer=2),
-            'question_3': InfoBox(screen, screen_width, screen_height, player, self.tsar_question_rect_3,
-                                  category='question_with_button',
-                                  tune=pygame.mixer.Sound(os.path.join('assets', 'anthems',
-                                                                       'shumi_marica_ivan_vazov.mp3')),
-                                  current_bg_music=self.tsar_music,
-                                  button_text='Шуми Марица', message=self.tsar_info[9].strip('\n'),
-                                  answers=['А) Иван Вазов', 'Б) Гео Милев', 'В) Петко Славейков'], correct_answer=1)}
-
-    def level_2_draw(self, screen: pygame.Surface, player: Player):
-        screen.fill('#BAAB98')
-        screen.blit(self.tsar_coat_of_arms_surf_1, self.tsar_coat_of_arms_rect_1)
-        screen.blit(self.tsar_coat_of_arms_surf_2, self.tsar_coat_of_arms_rect_2)
-        screen.blit(self.tsar_coat_of_arms_surf_3, self.tsar_coat_of_arms_rect_3)
-        screen.blit(self.tsar_coat_of_arms_surf_4, self.tsar_coat_of_arms_rect_4)
-        screen.blit(self.tsar_flag_surf_1, self.tsar_flag_rect_1)
-        screen.blit(self.tsar_anthem_surf_1, self.tsar_anthem_rect_1)
-        screen.blit(self.tsar_anthem_surf_2, self.tsar_anthem_rect_2)
-        screen.blit(self.tsar_question_surf_1, self.tsar_question_rect_1)
-        screen.blit(self.tsar_question_surf_2, self.tsar_question_rect_2)
-        screen.blit(self.tsar_question_surf_3, self.tsar_question_rect_3)
-        for platform in self.tsar_platforms:
-            screen.blit(platform[0], platform[2])
-        screen.blit(self.door_surf, self.door_rect)
-        screen.blit(player.image, player.rect)
-
-    def level_3(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player, mode: str,
-                colliding: bool, first_time: bool, communist_house_rect: pygame.Rect, victory: bool):
-        if not colliding:
-            player.room_update(self.communist_platforms)
-        if not muted:
-            self.communist_music.play(loops=-1)
-            self.communist_music.set_volume(0.03)
-        self.level_3_draw(screen, player, victory)
-        if enter_room(player.rect, self.door_rect):
-            self.communist_music.fadeout(2700)
-            fade(screen, screen_width, screen_height, lambda: self.level_3_draw(screen, player, victory))
-            first_time = True
-            player.rect.x, player.rect.y = communist_house_rect.center[0], player.map_ground[2].y - player.rect.height
-            mode = 'map'
-        if enter_room(player.rect, self.victory_door_rect):
-            self.communist_music.fadeout(2700)
-            fade(screen, screen_width, screen_height, lambda: self.level_3_draw(screen, player, victory))
-            first_time = True
-            player.rect.x, player.rect.y = communist_house_rect.center[0], player.map_ground[2].y - player.rect.height
+            player.rect.x, player.rect.y = house_rect.center[0], player.map_ground[1].y - player.rect.height
             mode = 'victory_screen'
 
-        colliding = (interact(screen, player.rect, self.communist_coat_of_arms_rect_1, self.communist_infoboxes,
-                              'coat_of_arms_1')
-                     or interact(screen, player.rect, self.communist_coat_of_arms_rect_2, self.communist_infoboxes,
-                                 'coat_of_arms_2')
-                     or interact(screen, player.rect, self.communist_flag_rect_1, self.communist_infoboxes, 'flag_1')
-                     or interact(screen, player.rect, self.communist_anthem_rect_1, self.communist_infoboxes,
-                                 'anthem_1')
-                     or interact(screen, player.rect, self.communist_anthem_rect_2, self.communist_infoboxes,
-                                 'anthem_2')
-                     or interact(screen, player.rect, self.communist_anthem_rect_3, self.communist_infoboxes,
-                                 'anthem_3')
-                     or interact(screen, player.rect, self.communist_anthem_rect_4, self.communist_infoboxes,
-                                 'anthem_4')
-                     or interact(screen, player.rect, self.communist_question_rect_1, self.communist_infoboxes,
-                                 'question_1')
-                     or interact(screen, player.rect, self.communist_question_rect_2, self.communist_infoboxes,
-                                 'question_2')
-                     or interact(screen, player.rect, self.communist_question_rect_3, self.communist_infoboxes,
-                                 'question_3'))
+        PROFILER.lap('update')
+        colliding = interact(screen, player.rect, room.interactables)
+        PROFILER.lap('interact')
         return mode, colliding, first_time
 
-    def level_3_build(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player):
-        self.communist_music = pygame.mixer.Sound(os.path.join('assets', 'music', 'communist_music.mp3'))
-        self.communist_info = None
-        with open('assets/info/communist_info.txt', encoding="utf8") as info:
-            self.communist_info = info.readlines()
-        self.communist_platforms = [init_platform(100, 10, self.screen_width - 1160, self.screen_height - 310),
-                                    init_platform(100, 10, self.screen_width - 1585, self.screen_height - 510),
-                                    init_platform(70, 10, self.screen_width - 1370, self.screen_height - 380),
-                                    init_platform(100, 10, self.screen_width - 690, self.screen_height - 510),
-                                    init_platform(70, 10, self.screen_width - 870, self.screen_height - 380),
-                                    init_platform(100, 10, self.screen_width - 1250, self.screen_height - 470),
-                                    init_platform(100, 10, self.screen_width - 1400, self.screen_height - 670),
-                                    init_platform(100, 10, self.screen_width - 900, self.screen_height - 670),
-                                    init_platform(100, 10, self.screen_width - 1050, self.screen_height - 470),
-                                    init_platform(100, 10, self.screen_width - 1820, self.screen_height - 630),
-                                    init_platform(100, 10, self.screen_width - 470, self.screen_height - 680),
-                                    init_platform(100, 10, self.screen_width - 1145, self.screen_height - 730),
-                                    init_platform(50, 10, self.screen_width - 1245, self.screen_height - 710),
-                                    init_platform(50, 10, self.screen_width - 995, self.screen_height - 710),
-                                    init_platform(screen_width, 160, 0, INFO.current_h - 160, 'darkred'),
-                                    init_platform(screen_width, 1, 0, -2)]
-        self.communist_coat_of_arms_surf_1, self.communist_coat_of_arms_rect_1 = init_symbol('coat_of_arms',
-                                                                                             'communist_icon',
-                                                                                             (42, 54),
-                                                                                             self.screen_width - 1220,
-                                                                                             self.screen_height - 530)
-        self.communist_coat_of_arms_surf_2, self.communist_coat_of_arms_rect_2 = init_symbol('coat_of_arms',
-                                                                                             'communist_icon',
-                                                                                             (42, 54),
-                                                                                             self.screen_width - 1020,
-                                                                                             self.screen_height - 530)
-        self.communist_flag_surf_1, self.communist_flag_rect_1 = init_symbol('flag', 'communist_icon', (54, 61),
-                                                                             self.screen_width - 1120,
-                                                                             self.screen_height - 375)
-        self.communist_anthem_surf_1, self.communist_anthem_rect_1 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                                 self.screen_width - 1570,
-                                                                                 self.screen_height - 580)
-        self.communist_anthem_surf_2, self.communist_anthem_rect_2 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                                 self.screen_width - 1380,
-                                                                                 self.screen_height - 740)
-        self.communist_anthem_surf_3, self.communist_anthem_rect_3 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                                 self.screen_width - 880,
-                                                                                 self.screen_height - 740)
-        self.communist_anthem_surf_4, self.communist_anthem_rect_4 = init_symbol('anthem', 'anthem_icon', (64, 60),
-                                                                                 self.screen_width - 670,
-                                                                                 self.screen_height - 580)
-        self.communist_question_surf_1, self.communist_question_rect_1 = init_symbol('question', 'icon', (48, 87),
-                                                                                     self.screen_width - 1795,
-                                                                                     self.screen_height - 720)
-        self.communist_question_surf_2, self.communist_question_rect_2 = init_symbol('question', 'icon', (48, 87),
-                                                                                     self.screen_width - 445,
-                                                                                     self.screen_height - 770)
-        self.communist_question_surf_3, self.communist_question_rect_3 = init_symbol('question', 'icon', (48, 87),
-                                                                                     self.screen_width - 1120,
-                                                                                     self.screen_height - 820)
-        self.communist_infoboxes = {
-            'coat_of_arms_1': InfoBox(screen, screen_width, screen_height, player, self.communist_coat_of_arms_rect_1,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='dimitrov', size=(), x=15, y=15),
-                                      message=self.communist_info[0].strip('\n')),
-            'coat_of_arms_2': InfoBox(screen, screen_width, screen_height, player, self.communist_coat_of_arms_rect_2,
-                                      thing=init_symbol(symbol='coat_of_arms', variety='zhivkov', size=(), x=15, y=15),
-                                      message=self.communist_info[1].strip('\n')),
-            'flag_1': InfoBox(screen, screen_width, screen_height, player, self.communist_flag_rect_1,
-                              thing=init_symbol(symbol='flag', variety='dimitrov', size=(384, 231), x=15, y=15),
-                              message=self.communist_info[2].strip('\n')),
-            'anthem_1': InfoBox(screen, screen_width, screen_height, player, self.communist_anthem_rect_1,
-                                category='with_button', button_text='Републико наша здравей', tune=pygame.mixer.Sound(
-                    os.path.join('assets', 'anthems', 'republico_nasha_zdravei.mp3')),
-                                current_bg_music=self.communist_music, message=self.communist_info[3].strip('\n')),
-            'anthem_2': InfoBox(screen, screen_width, screen_height, player, self.communist_anthem_rect_2,
-                                category='with_button', button_text='Земя на герои',
-                                tune=pygame.mixer.Sound(os.path.join('assets', 'anthems', 'zemia_na_geroi.mp3')),
-                                current_bg_music=self.communist_music, message=self.communist_info[4].strip('\n')),
-            'anthem_3': InfoBox(screen, screen_width, screen_height, player, self.communist_anthem_rect_3,
-                                category='with_button', button_text='Мила родино(1964-1989)',
-                                tune=pygame.mixer.Sound(os.path.join('assets', 'anthems', 'mila_rodino_zhivkov.mp3')),
-                                current_bg_music=self.communist_music, message=self.communist_info[5].strip('\n')),
-            'anthem_4': InfoBox(screen, screen_width, screen_height, player, self.communist_anthem_rect_4,
-                                category='with_button', button_text='Мила родино',
-                                tune=pygame.mixer.Sound(os.path.join('assets', 'anthems', 'mila_rodino.mp3')),
-                                current_bg_music=self.communist_music, message=self.communist_info[6].strip('\n')),
-            'question_1': InfoBox(screen, screen_width, screen_height, player, self.communist_question_rect_1,
-                                  thing=init_symbol(symbol='portrait', variety='georgi_jagarov', size=(195, 296),
-                                                    x=15, y=15),
-                                  category='question', message=self.communist_info[7].strip('\n'),
-                                  answers=['А) Георги Димитров', 'Б) Тодор Живков', 'В) Вълко Червенков'],
-                                  correct_answer=2),
-            'question_2': InfoBox(screen, screen_width, screen_height, player, self.communist_question_rect_2,
-                                  thing=init_symbol(symbol='coat_of_arms', variety='dimitrov', size=(), x=15, y=15),
-                                  category='question', message=self.communist_info[8].strip('\n'),
-                                  answers=['А) Живковската', 'Б) Търновската', 'В) Димитровската'], correct_answer=3),
-            'question_3': InfoBox(screen, screen_width, screen_height, player, self.communist_question_rect_3,
-                                  thing=init_symbol(symbol='flag', variety='zhivkov', size=(384, 231), x=15, y=15),
-                                  category='question', message=self.communist_info[9].strip('\n'),
-                                  answers=['А) 12 юни 1967г', 'Б) 4 декември 1947г', 'В) 9 септември 1944г'],
-                                  correct_answer=1)}
-
-    def level_3_draw(self, screen: pygame.Surface, player: Player, victory: bool):
-        screen.fill('#BAAB98')
-        screen.blit(self.communist_coat_of_arms_surf_1, self.communist_coat_of_arms_rect_1)
-        screen.blit(self.communist_coat_of_arms_surf_2, self.communist_coat_of_arms_rect_2)
-        screen.blit(self.communist_flag_surf_1, self.communist_flag_rect_1)
-        screen.blit(self.communist_anthem_surf_1, self.communist_anthem_rect_1)
-        screen.blit(self.communist_anthem_surf_2, self.communist_anthem_rect_2)
-        screen.blit(self.communist_anthem_surf_3, self.communist_anthem_rect_3)
-        screen.blit(self.communist_anthem_surf_4, self.communist_anthem_rect_4)
-        screen.blit(self.communist_question_surf_1, self.communist_question_rect_1)
-        screen.blit(self.communist_question_surf_2, self.communist_question_rect_2)
-        screen.blit(self.communist_question_surf_3, self.communist_question_rect_3)
-        for platform in self.communist_platforms:
-            screen.blit(platform[0], platform[2])
-        screen.blit(self.door_surf, self.door_rect)
-        if victory:
-            screen.blit(self.victory_door_surf, self.victory_door_rect)
-        screen.blit(player.image, player.rect)
+    def room_draw(self, level: int, screen: pygame.Surface, player: Player, victory: bool = False):
+        room = self.rooms[level]
+        # the victory door is part of the baked background, so rebake only when it appears or disappears
+        victory = victory and room.victory_door
+        if room.background is None or room.background_victory != victory:
+            doors = [(self.door_surf, self.door_rect)]
+            if victory:
+                doors.append((self.victory_door_surf, self.victory_door_rect))
+            room.background = self.bake_background(room.sprites, room.platforms, doors)
+            room.background_victory = victory
+        screen.blit(room.background, (0, 0))
+        screen.blit(player.image, player.draw_rect)
+
+
+class Room:
+    def __init__(self, music: str, volume: float, platforms: list, sprites: list, rects: dict, infoboxes: dict,
+                 victory_door: bool):
+        self.music, self.volume = music, volume
+        self.platforms = platforms
+        self.platform_grid = platform_grid(platforms)
+        self.sprites = sprites
+        self.rects = rects
+        self.infoboxes = infoboxes
+        self.interactables = Interactables(infoboxes)
+        for key, rect in rects.items():
+            self.interactables.register(rect, key)
+        self.victory_door = victory_door
+        self.background = None
+        self.background_victory = False
+
+
+ROOMS = ('uprising', 'tsar', 'communist')
+ROOM_CACHE = os.path.join('.cache', 'levels')
+ROOM_CACHE_VERSION = 2
+
+
+def load_room(name: str):
+    source = PACK.read(os.path.join('assets', 'levels', f'{name}.json'))
+    info = PACK.read(os.path.join('assets', 'info', f'{name}_info.txt'))
+
+    # compiled rooms hold only dicts, lists, tuples, strings and numbers, which marshal stores without running
+    # any code on load, unlike pickle; its format changes between Python versions, so that is part of the key
+    digest = hashlib.sha256(b'%d\0%d\0%s\0%s' % (ROOM_CACHE_VERSION, marshal.version, source, info)).hexdigest()
+    cache_path = os.path.join(ROOM_CACHE, f'{name}-{digest[:16]}.marshal')
+    with contextlib.suppress(OSError, EOFError, ValueError, TypeError):
+        with open(cache_path, 'rb') as file:
+            return marshal.load(file)
+
+    room = compile_room(json.loads(source), info.decode('utf8').splitlines())
+    with contextlib.suppress(OSError):
+        os.makedirs(ROOM_CACHE, exist_ok=True)
+        with open(cache_path, 'wb') as file:
+            marshal.dump(room, file)
+    return room
+
+
+# cached by load_room, so any change to what this returns must bump ROOM_CACHE_VERSION
+def compile_room(data: dict, info: list):
+    objects, infoboxes = [], []
+    for item in data['objects']:
+        objects.append((item['key'], item['symbol'], item['variety'], tuple(item['size']), tuple(item['position'])))
+        infobox = item['infobox']
+        thing = infobox.get('thing')
+        if thing:
+            thing = thing['symbol'], thing['variety'], tuple(thing['size'])
+        options = {'category': infobox.get('category', ''), 'message': info[infobox['text']]}
+        if 'tune' in infobox:
+            options['tune'] = os.path.join('assets', 'anthems', infobox['tune'])
+        if 'button_text' in infobox:
+            options['button_text'] = infobox['button_text']
+        if 'answers' in infobox:
+            options['answers'] = tuple(infobox['answers'])
+            options['correct_answer'] = infobox['correct_answer']
+        infoboxes.append((item['key'], infobox.get('anchor', item['key']), thing, options))
+
+    return {'music': os.path.join('assets', 'music', data['music']), 'volume': data['volume'],
+            'ground': data['ground'], 'victory_door': data.get('victory_door', False),
+            'platforms': [tuple(platform) for platform in data['platforms']], 'objects': objects,
+            'infoboxes': infoboxes}
+
+
+class Interactables:
+    def __init__(self, infoboxes: dict):
+        self.infoboxes = infoboxes
+        self.grid = SpatialGrid()
+        self.order = {}
+        self.displayed = None
+
+    def register(self, rect: pygame.Rect, key: str):
+        self.order[key] = len(self.order)
+        self.grid.insert(rect, key)
+
+    def hit(self, rect: pygame.Rect):
+        # the first registered object wins when the player touches several at once
+        return min(self.grid.query(rect), key=self.order.get, default=None)
+
+
+INFOBOX_FONT = os.path.join('assets', 'fonts', 'NotoSerif-Bold.ttf'), 20
+# a little wider than the longest line written by hand, so the existing texts keep their breaks
+INFOBOX_TEXT_WIDTH = 1100
+
+
+def wrap_text(font: pygame.font.Font, text: str, width: int):
+    # the literal \n markers in the info texts stay forced breaks, anything wider than width is wrapped by word
+    lines = []
+    for paragraph in text.replace(r'\n', '\n').split('\n'):
+        if font.size(paragraph)[0] <= width:
+            lines.append(paragraph)
+            continue
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f'{line} {word}' if line else word
+            if line and font.size(candidate)[0] > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+# enough for every box of the largest room with a couple of looks each, so walking around one room renders each
+# box once
+INFOBOX_BUDGET = 64 * 1024 * 1024
+# pre-rendered looks kept per box, hovering mostly flips between two of them
+INFOBOX_COMPOSITES = 3
+
+
+class InfoBoxDescriptor:
+    def __init__(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player,
+                 anchor: pygame.Rect, thing: tuple, options: dict):
+        self.screen = screen
+        self.screen_width, self.screen_height = screen_width, screen_height
+        self.player = player
+        self.anchor = anchor
+        self.thing = thing
+        self.options = options
+        self.answer = None
+        self.box = None
+
+    @property
+    def is_correct(self):
+        # the answer outlives the rendered box, so the victory check can read it from here
+        return getattr(self.box, 'is_correct', None) if self.box is not None else self.answer
+
+    def materialise(self):
+        options = dict(self.options)
+        if self.thing:
+            options['thing'] = init_symbol(*self.thing, x=15, y=15)
+        if 'answers' in options:
+            options['answers'] = list(options['answers'])
+        box = InfoBox(self.screen, self.screen_width, self.screen_height, self.player, self.anchor, **options)
+        if hasattr(box, 'is_correct'):
+            box.is_correct = self.answer
+        return box
+
+    def release(self):
+        self.answer = self.is_correct
+        self.box = None
+
+
+class InfoBoxCache:
+    def __init__(self, budget: int = INFOBOX_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.materialised = 0
+        self.boxes = OrderedDict()
+
+    def get(self, descriptor: InfoBoxDescriptor):
+        if descriptor.box is None:
+            descriptor.box = descriptor.materialise()
+            self.boxes[descriptor] = 0
+            self.materialised += 1
+            self.charge(descriptor)
+        self.boxes.move_to_end(descriptor)
+        return descriptor.box
+
+    def charge(self, descriptor: InfoBoxDescriptor):
+        # composites are only rendered while a box is shown, so they are counted as they come and go
+        size = descriptor.box.footprint()
+        self.used += size - self.boxes[descriptor]
+        self.boxes[descriptor] = size
+        self.evict(keep=descriptor)
+
+    def evict(self, keep=None):
+        while self.used > self.budget and len(self.boxes) > 1:
+            descriptor, size = next(iter(self.boxes.items()))
+            if descriptor is keep:
+                break
+            del self.boxes[descriptor]
+            self.used -= size
+            descriptor.release()
+
+    def stats(self):
+        return {'materialised': self.materialised, 'resident': len(self.boxes), 'used': self.used,
+                'budget': self.budget}
+
+
+INFOBOXES = InfoBoxCache()
 
 
 class InfoBox:
     def __init__(self, screen: pygame.Surface, screen_width: int, screen_height: int, player: Player,
-                 main_object_rect: pygame.rect, thing: tuple = '', category: str = '', tune: pygame.mixer.Sound = '',
-                 current_bg_music: pygame.mixer.Sound = '', button_text: str = 'play', message: str = '',
+                 main_object_rect: pygame.rect, thing: tuple = '', category: str = '', tune: str = '',
+                 button_text: str = 'play', message: str = '',
                  answers: list[str, str, str] = (), correct_answer=1):
         self.type = category
         if self.type == 'with_button':
@@ -534,58 +1088,46 @@ class InfoBox:
             self.is_playing = False
             self.is_not_playing = True
             self.tune = tune
-            self.current_bg_music = current_bg_music
         elif self.type == 'question_with_button':
             self.is_pressed = False
             self.is_playing = False
             self.is_not_playing = True
             self.tune = tune
-            self.current_bg_music = current_bg_music
-            self.correct = pygame.transform.rotozoom(
-                pygame.image.load(os.path.join('assets', 'gallery', 'true.png')).convert_alpha(), 0, 1)
-            self.incorrect = pygame.transform.rotozoom(
-                pygame.image.load(os.path.join('assets', 'gallery', 'false.png')).convert_alpha(), 0, 1)
+            self.correct = ASSETS.image(os.path.join('assets', 'gallery', 'true.png'))
+            self.incorrect = ASSETS.image(os.path.join('assets', 'gallery', 'false.png'))
             self.is_correct = None
         else:
             if self.type == 'question':
-                self.correct = pygame.transform.rotozoom(
-                    pygame.image.load(os.path.join('assets', 'gallery', 'true.png')).convert_alpha(), 0, 1)
-                self.incorrect = pygame.transform.rotozoom(
-                    pygame.image.load(os.path.join('assets', 'gallery', 'false.png')).convert_alpha(), 0, 1)
+                self.correct = ASSETS.image(os.path.join('assets', 'gallery', 'true.png'))
+                self.incorrect = ASSETS.image(os.path.join('assets', 'gallery', 'false.png'))
                 self.is_correct = None
             self.image_surf, self.image_rect = thing
-        font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-Bold.ttf'), 20)
-
-        # transform text
-        self.message = message.split(r'\n')
-        self.message = [font.render(mess, True, '#704F27', '#BAAC9B') for mess in self.message]
+        # transform text, wrapped by measuring before anything is rendered
+        lines = ASSETS.layout(*INFOBOX_FONT, message, INFOBOX_TEXT_WIDTH)
+        self.message = [ASSETS.text(*INFOBOX_FONT, line, '#704F27', '#BAAC9B') for line in lines]
+        self.text_width = max(text_surf.get_width() for text_surf in self.message)
         self.message_rect = []
-        self.longest_text_index = 0
         self.h = 5
         if self.type == 'with_button':
             self.text_position((len(button_text) * 16) + 30, 5)
-            self.info_surf = pygame.Surface(
-                (self.message_rect[self.longest_text_index].width + (len(button_text) * 16) + 30, max(50, self.h) + 20))
+            self.info_surf = pygame.Surface((self.text_width + (len(button_text) * 16) + 30, max(50, self.h) + 20))
         elif self.type == 'question_with_button':
             self.text_position((len(button_text) * 17) + 40, 5)
-            self.info_surf = pygame.Surface((self.message_rect[self.longest_text_index].width + (
-                    len(button_text) * 17) + 20, max(50, self.h) + 300))
+            self.info_surf = pygame.Surface((self.text_width + (len(button_text) * 17) + 20, max(50, self.h) + 300))
         else:
             self.text_position(self.image_rect.width + 25, 5)
             if self.type == 'question':
-                self.info_surf = pygame.Surface((self.message_rect[
-                                                     self.longest_text_index].width + self.image_rect.width + 60,
+                self.info_surf = pygame.Surface((self.text_width + self.image_rect.width + 60,
                                                  max(self.image_rect.height, self.h) + 300))
             else:
-                self.info_surf = pygame.Surface((self.message_rect[
-                                                     self.longest_text_index].width + self.image_rect.width + 60,
+                self.info_surf = pygame.Surface((self.text_width + self.image_rect.width + 60,
                                                  max(self.image_rect.height, self.h) + 20))
 
         # create and blit to info_surf
         self.info_surf.fill('#BAAC9B')
         self.info_rect = self.info_surf.get_rect(
             topleft=(main_object_rect.right, main_object_rect.bottom - (main_object_rect.height // 2)))
-        while self.info_rect.bottom > screen_height - player.map_ground[2].height:
+        while self.info_rect.bottom > screen_height - player.map_ground[1].height:
             self.info_rect.bottom -= 100
 
         while self.info_rect.right > screen_width:
@@ -637,8 +1179,16 @@ class InfoBox:
 
         [self.info_surf.blit(text_surf, text_rect) for text_surf, text_rect in zip(self.message, self.message_rect)]
 
+        self.buttons = ([self.button] if hasattr(self, 'button') else []) + getattr(self, 'question', [])
+        # buttons are placed on the screen, not on the box, so a composite covers both
+        self.area = self.info_rect.unionall([button.extent() for button in self.buttons])
+        self.composites = OrderedDict()
+
+    def footprint(self):
+        return surface_bytes(self.info_surf) + sum(surface_bytes(composite) for composite in self.composites.values())
+
     def text_position(self, x: int, y: int):
-        for i, mess in enumerate(self.message):
+        for mess in self.message:
             if self.type == 'with_button' or self.type == 'question_with_button':
                 if self.h >= 50:
                     mess_rect = mess.get_rect(topleft=(20, y + self.h))
@@ -649,49 +1199,58 @@ class InfoBox:
                     mess_rect = mess.get_rect(topleft=(20, y + self.h))
                 else:
                     mess_rect = mess.get_rect(topleft=(x, y + self.h))
-            if self.message_rect and mess_rect.width > self.message_rect[self.longest_text_index].width:
-                self.longest_text_index = i
             self.message_rect.append(mess_rect)
             self.h += 30
 
     def display_infobox(self, screen: pygame.Surface):
-        screen.blit(self.info_surf, self.info_rect)
-        pygame.draw.rect(screen, '#704F27', self.info_rect, 5, 10)
+        # the look only depends on the answer and on how each button is hovered or pressed
+        for button in self.buttons:
+            button.place()
+        state = getattr(self, 'is_correct', None), tuple(button.look() for button in self.buttons)
+        composite = self.composites.get(state)
+        if composite is None:
+            composite = self.composites[state] = self.compose()
+            if len(self.composites) > INFOBOX_COMPOSITES:
+                self.composites.popitem(last=False)
+        else:
+            self.composites.move_to_end(state)
+        screen.blit(composite, self.area)
+
         if self.type == 'with_button' or self.type == 'question_with_button':
-            self.button.draw()
             self.play_anthem()
         if self.type == 'question' or self.type == 'question_with_button':
-            self.question_draw()
             if type(self.is_correct) is not bool:
                 self.question_check()
+
+    def compose(self):
+        if self.area == self.info_rect:
+            composite = pygame.Surface(self.area.size).convert()
+        else:
+            composite = pygame.Surface(self.area.size, pygame.SRCALPHA).convert_alpha()
+        offset = -self.area.x, -self.area.y
+        box_rect = self.info_rect.move(offset)
+        composite.blit(self.info_surf, box_rect)
+        if getattr(self, 'is_correct', None) is not None:
+            marker = self.correct if self.is_correct else self.incorrect
             if self.type == 'question':
-                if self.is_correct:
-                    correct_rect = self.correct.get_rect(
-                        center=(self.info_rect.width - 200, max(self.image_rect.height, self.h) + 150))
-                    self.info_surf.blit(self.correct, correct_rect)
-                elif self.is_correct is False:
-                    incorrect_rect = self.incorrect.get_rect(
-                        center=(self.info_rect.width - 200, max(self.image_rect.height, self.h) + 150))
-                    self.info_surf.blit(self.incorrect, incorrect_rect)
-            elif self.type == 'question_with_button':
-                if self.is_correct:
-                    correct_rect = self.correct.get_rect(center=(self.info_rect.width - 200, self.h + 150))
-                    self.info_surf.blit(self.correct, correct_rect)
-                elif self.is_correct is False:
-                    incorrect_rect = self.incorrect.get_rect(center=(self.info_rect.width - 200, self.h + 150))
-                    self.info_surf.blit(self.incorrect, incorrect_rect)
+                center = self.info_rect.width - 200, max(self.image_rect.height, self.h) + 150
+            else:
+                center = self.info_rect.width - 200, self.h + 150
+            composite.blit(marker, marker.get_rect(center=center).move(box_rect.topleft))
+        pygame.draw.rect(composite, '#704F27', box_rect, 5, 10)
+        for button in self.buttons:
+            button.draw_on(composite, offset)
+        return composite
 
     def play_anthem(self):
         self.is_pressed = self.button.is_clicked()
         if self.is_pressed and self.is_not_playing:
             self.is_playing = True
         elif self.is_playing:
-            self.current_bg_music.stop()
-            self.tune.play(loops=-1)
-            self.tune.set_volume(0.1)
+            AUDIO.play('anthem', self.tune, volume=0.1, fade_ms=0)
             self.is_not_playing = False
-            if self.is_pressed or (pygame.key.get_pressed()[pygame.K_e] or pygame.key.get_pressed()[pygame.K_RCTRL]):
-                pygame.mixer.stop()
+            if self.is_pressed or INPUT.pressed('interact'):
+                AUDIO.stop('anthem')
                 self.is_playing = False
         elif not self.is_pressed:
             self.is_not_playing = True
@@ -705,10 +1264,6 @@ class InfoBox:
                 else:
                     self.is_correct = False
 
-    def question_draw(self):
-        for button in self.question:
-            button.draw()
-
 
 class Button:
     def __init__(self, master: pygame.Surface, text: str, width: int, height: int, position: tuple[int, int],
@@ -731,29 +1286,42 @@ class Button:
         self.top_rect = pygame.Rect(position, (self.width, self.height))
         self.top_color = main_color
 
-        button_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), button_font_size)
-        self.text_surf = button_font.render(text, True, button_text_color)
+        self.text_surf = ASSETS.text(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), button_font_size,
+                                     text, button_text_color)
         self.text_rect = self.text_surf.get_rect(center=self.top_rect.center)
         self.top_rect.width = max(self.text_rect.width + 10, self.top_rect.width)
 
         self.bottom_rect = pygame.Rect(position, (self.top_rect.width, elevation))
         self.bottom_color = self.b_main_color
 
-    def draw(self):
+    def place(self):
         self.top_rect.y = self.start_y_position - self.dynamic_elevation
         self.text_rect.center = self.top_rect.center
 
         self.bottom_rect.top = self.top_rect.top
         self.bottom_rect.height = self.top_rect.height + self.dynamic_elevation
 
-        pygame.draw.rect(self.master, self.bottom_color, self.bottom_rect, border_radius=12)
-        pygame.draw.rect(self.master, self.top_color, self.top_rect, border_radius=12)
-        self.master.blit(self.text_surf, self.text_rect)
+    def look(self):
+        return self.top_color, self.bottom_color, self.dynamic_elevation
+
+    def extent(self):
+        # everything the button covers at any elevation
+        return pygame.Rect(self.x_position, self.start_y_position - self.elevation, self.top_rect.width,
+                           self.height + self.elevation)
+
+    def draw(self):
+        self.draw_on(self.master)
+        RENDERER.add(self.bottom_rect)
+
+    def draw_on(self, surface: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        self.place()
+        pygame.draw.rect(surface, self.bottom_color, self.bottom_rect.move(offset), border_radius=12)
+        pygame.draw.rect(surface, self.top_color, self.top_rect.move(offset), border_radius=12)
+        surface.blit(self.text_surf, self.text_rect.move(offset))
 
     def is_clicked(self):
-        mouse_position = pygame.mouse.get_pos()
-        left_mouse_button_is_clicked = pygame.mouse.get_pressed()[0]
-        if self.top_rect.collidepoint(mouse_position):
+        left_mouse_button_is_clicked = INPUT.is_held('click')
+        if self.top_rect.collidepoint(INPUT.mouse_position):
             self.top_color = self.hover_color
             self.bottom_color = self.b_hover_color
             if left_mouse_button_is_clicked:
@@ -775,54 +1343,63 @@ class Button:
 def init_symbol(symbol: str, variety: str, size: tuple, x: int, y: int):
     if variety and symbol:
         if symbol == 'anthem' or symbol == 'portrait':
-            image = pygame.image.load(os.path.join('assets', 'gallery', f'{variety}.png')).convert_alpha()
-            if size:
-                image = pygame.transform.scale(image, size)
+            image = ASSETS.image(os.path.join('assets', 'gallery', f'{variety}.png'), size=size)
             rect = image.get_rect(topleft=(x, y))
         elif symbol == 'question':
-            image = pygame.image.load(os.path.join('assets', 'gallery', f'{symbol}_{variety}.png')).convert_alpha()
-            if size:
-                image = pygame.transform.scale(image, size)
+            image = ASSETS.image(os.path.join('assets', 'gallery', f'{symbol}_{variety}.png'), size=size)
             rect = image.get_rect(topleft=(x, y))
         else:
-            image = pygame.image.load(os.path.join('assets', 'gallery', f'{variety}_{symbol}.png')).convert_alpha()
-            if size:
-                image = pygame.transform.scale(image, size)
+            image = ASSETS.image(os.path.join('assets', 'gallery', f'{variety}_{symbol}.png'), size=size)
             rect = image.get_rect(topleft=(x, y))
         return image, rect
 
 
-def interact(screen: pygame.Surface, player: pygame.Rect, object_rect: pygame.Rect, info_boxes: dict,
-             current_object: str):
-    global is_opened, is_closed, displayed_object
+def interact(screen: pygame.Surface, player: pygame.Rect, interactables: Interactables):
+    descriptor = interactables.infoboxes.get(interactables.displayed)
+    if descriptor is None:
+        if INPUT.pressed('interact'):
+            interactables.displayed = interactables.hit(player)
+        return interactables.displayed is not None
 
-    interaction = pygame.key.get_pressed()[pygame.K_e] or pygame.key.get_pressed()[pygame.K_RCTRL]
-    if interaction and object_rect.colliderect(player) and is_closed:
-        displayed_object = current_object
-        is_opened = True
-        return True
-    elif is_opened and current_object == displayed_object:
-        info_boxes[current_object].display_infobox(screen)
-        is_closed = False
-        if interaction:
-            is_opened = False
-        return True
-    elif not interaction:
-        is_closed = True
-    return False
+    infobox = INFOBOXES.get(descriptor)
+    infobox.display_infobox(screen)
+    INFOBOXES.charge(descriptor)
+    RENDERER.add(infobox.area)
+    if INPUT.pressed('interact'):
+        interactables.displayed = None
+    return True
 
 
 def init_platform(width: int, height: int, x: int, y: int, color='#4A360E'):
     platform = pygame.Surface((width, height))
     platform.fill(color)
-    mask = pygame.mask.from_surface(platform)
     rect = platform.get_rect(topleft=(x, y))
-    return platform, mask, rect
+    return platform, rect
+
+
+def platform_grid(platforms: list):
+    grid = SpatialGrid()
+    for _, rect in platforms:
+        grid.insert(rect, rect)
+    return grid
+
+
+def sweep(rect: pygame.Rect, dx: int, dy: int, platforms: SpatialGrid):
+    # clamps a move along one axis to the first platform in the swept path, so nothing is skipped at any speed
+    for other in platforms.query(rect.union(rect.move(dx, dy))):
+        if dx > 0 and other.left >= rect.right:
+            dx = min(dx, other.left - rect.right)
+        elif dx < 0 and other.right <= rect.left:
+            dx = max(dx, other.right - rect.left)
+        elif dy > 0 and other.top >= rect.bottom:
+            dy = min(dy, other.top - rect.bottom)
+        elif dy < 0 and other.bottom <= rect.top:
+            dy = max(dy, other.bottom - rect.top)
+    return dx, dy
 
 
 def enter_room(player: pygame.Rect, room_rect: pygame.Rect):
-    interaction = pygame.key.get_pressed()[pygame.K_e] or pygame.key.get_pressed()[pygame.K_RCTRL]
-    if interaction and room_rect.colliderect(player):
+    if INPUT.pressed('interact') and room_rect.colliderect(player):
         return True
     return False
 
@@ -831,22 +1408,19 @@ def init_room_objects(new_size: tuple[int, int], x: int, y: int, thing: str, cat
     surf, rect = None, None
     match thing:
         case 'house':
-            surf = pygame.image.load(os.path.join('assets', 'gallery', f'{category}_{thing}.png')).convert_alpha()
-            surf = pygame.transform.scale(surf, new_size)
+            surf = ASSETS.image(os.path.join('assets', 'gallery', f'{category}_{thing}.png'), size=new_size)
             rect = surf.get_rect(midbottom=(x, y))
         case 'door':
-            surf = pygame.image.load(os.path.join('assets', 'gallery', f'{thing}.png')).convert_alpha()
-            surf = pygame.transform.scale(surf, new_size)
+            surf = ASSETS.image(os.path.join('assets', 'gallery', f'{thing}.png'), size=new_size)
             rect = surf.get_rect(midbottom=(x, y))
         case 'victory_door':
-            surf = pygame.image.load(os.path.join('assets', 'gallery', f'{thing}.png')).convert_alpha()
-            surf = pygame.transform.scale(surf, new_size)
+            surf = ASSETS.image(os.path.join('assets', 'gallery', f'{thing}.png'), size=new_size)
             rect = surf.get_rect(midbottom=(x, y))
     return surf, rect
 
 
 def title_screen_build(screen: pygame.Surface, screen_width: int, screen_height: int):
-    font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 80)
+    font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 80)
     title = font.render('Български държавни символи', True, '#B69945')
     start_button = Button(screen, text='НАЧАЛО', width=400, height=100,
                           position=(screen_width - 600, screen_height - 700), button_font_size=40, elevation=4)
@@ -854,28 +1428,26 @@ def title_screen_build(screen: pygame.Surface, screen_width: int, screen_height:
                            position=(screen_width - 600, screen_height - 550), button_font_size=40, elevation=4)
     exit_button = Button(screen, text='ИЗХОД', width=400, height=100,
                          position=(screen_width - 600, screen_height - 400), button_font_size=40, elevation=4)
-    title_screen_image = pygame.image.load(os.path.join('assets', 'gallery', 'title_screen_logo.png')).convert_alpha()
-    title_screen_image = pygame.transform.rotozoom(title_screen_image, 0, screen_height * 0.0008)
-    title_screen_music = pygame.mixer.Sound(os.path.join('assets', 'music', 'title_screen_music.mp3'))
-    title_screen_music.set_volume(0.05)
+    title_screen_image = ASSETS.image(os.path.join('assets', 'gallery', 'title_screen_logo.png'),
+                                      zoom=screen_height * 0.0008)
+    title_screen_music = os.path.join('assets', 'music', 'title_screen_music.mp3')
 
     return title, start_button, credit_button, exit_button, title_screen_image, title_screen_music
 
 
 def title_screen_update(screen: pygame.Surface, screen_width: int, screen_height: int, title: pygame.Surface,
                         start_button: Button, credit_button: Button, exit_button: Button,
-                        title_screen_image: pygame.Surface, title_screen_music: pygame.mixer.Sound, first_time: bool):
+                        title_screen_image: pygame.Surface, title_screen_music: str, first_time: bool):
     title_screen_draw(screen, title, start_button, credit_button, exit_button, title_screen_image)
-    if not muted:
-        title_screen_music.play()
+    AUDIO.play('background', title_screen_music, volume=0.05)
     if start_button.is_clicked():
         first_time = True
         return 'map', first_time
     elif credit_button.is_clicked():
         return 'credit_screen', first_time
     elif exit_button.is_clicked():
-        title_screen_music.fadeout(6000)
-        fade(screen, screen_width, screen_height,
+        AUDIO.fadeout('background', 6000)
+        fade(screen,
              lambda: title_screen_draw(screen, title, start_button, credit_button, exit_button, title_screen_image))
         return 'exit', first_time
     return 'title_screen', first_time
@@ -884,13 +1456,24 @@ def title_screen_update(screen: pygame.Surface, screen_width: int, screen_height
 def title_screen_draw(screen: pygame.Surface, title: pygame.Surface, start_button: Button, credit_button: Button,
                       exit_button: Button, title_screen_image: pygame.Surface):
     screen.fill('#056E30')
-    screen.blit(title, (INFO.current_w // 2 - 600, 50))
+    screen.blit(title, (screen.get_width() // 2 - 600, 50))
     screen.blit(title_screen_image, (350, 180))
     start_button.draw()
     credit_button.draw()
     exit_button.draw()
 
 
+def title_screen_loading_draw(screen: pygame.Surface, screen_width: int, screen_height: int, title: pygame.Surface,
+                              progress: float):
+    screen.fill('#056E30')
+    screen.blit(title, (screen_width // 2 - 600, 50))
+    bar_rect = pygame.Rect(0, 0, screen_width // 3, 30)
+    bar_rect.center = (screen_width // 2, screen_height // 2)
+    pygame.draw.rect(screen, '#02401B', bar_rect, border_radius=12)
+    pygame.draw.rect(screen, '#B69945', (bar_rect.x, bar_rect.y, bar_rect.width * progress, bar_rect.height),
+                     border_radius=12)
+
+
 def credit_screen_build(screen: pygame.Surface, screen_width: int, screen_height: int):
     def coding_resources():
         h = 90
@@ -942,9 +1525,9 @@ def credit_screen_build(screen: pygame.Surface, screen_width: int, screen_height
 
         return art_surf, art_rect
 
-    credit_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 70)
-    big_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 50)
-    font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 40)
+    credit_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 70)
+    big_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 50)
+    font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 40)
 
     credit_title = credit_font.render('КРЕДИТИ', True, '#B69945')
     authors_title = big_font.render('Автори, ученици от СПГЕ "Джон Атанасов" София-град:', True, '#B69945')
@@ -962,82 +1545,60 @@ def credit_screen_build(screen: pygame.Surface, screen_width: int, screen_height
     back_button = Button(screen, text='НАЗАД', width=400, height=100, position=(50, screen_height - 200),
                          button_font_size=40, elevation=4)
 
-    python_logo = pygame.image.load(os.path.join('assets', 'gallery', 'python_logo.png')).convert_alpha()
-    python_logo = pygame.transform.rotozoom(python_logo, 0, 0.14)
-    pygame_logo = pygame.image.load(os.path.join('assets', 'gallery', 'pygame_logo.png')).convert_alpha()
-    pygame_logo = pygame.transform.rotozoom(pygame_logo, 0, 0.7)
-    vscode_logo = pygame.image.load(os.path.join('assets', 'gallery', 'vscode_logo.png')).convert_alpha()
-    vscode_logo = pygame.transform.rotozoom(vscode_logo, 0, 0.11)
-    bgherald_logo = pygame.image.load(os.path.join('assets', 'gallery', 'bgherald_logo.png')).convert_alpha()
-    bgherald_logo = pygame.transform.rotozoom(bgherald_logo, 0, 1)
-    book = pygame.image.load(os.path.join('assets', 'gallery', 'book.png')).convert_alpha()
-    book = pygame.transform.rotozoom(book, 0, 0.27)
-    pixilart_logo = pygame.image.load(os.path.join('assets', 'gallery', 'pixilart_logo.png')).convert_alpha()
-    pixilart_logo = pygame.transform.rotozoom(pixilart_logo, 0, 0.7)
-    gimp_logo = pygame.image.load(os.path.join('assets', 'gallery', 'gimp_logo.png')).convert_alpha()
-    gimp_logo = pygame.transform.rotozoom(gimp_logo, 0, 0.35)
-    fl_studio_logo = pygame.image.load(os.path.join('assets', 'gallery', 'fl_studio_logo.png')).convert_alpha()
-    fl_studio_logo = pygame.transform.rotozoom(fl_studio_logo, 0, 0.75)
+    python_logo = ASSETS.image(os.path.join('assets', 'gallery', 'python_logo.png'), zoom=0.14)
+    pygame_logo = ASSETS.image(os.path.join('assets', 'gallery', 'pygame_logo.png'), zoom=0.7)
+    vscode_logo = ASSETS.image(os.path.join('assets', 'gallery', 'vscode_logo.png'), zoom=0.11)
+    bgherald_logo = ASSETS.image(os.path.join('assets', 'gallery', 'bgherald_logo.png'), zoom=1)
+    book = ASSETS.image(os.path.join('assets', 'gallery', 'book.png'), zoom=0.27)
+    pixilart_logo = ASSETS.image(os.path.join('assets', 'gallery', 'pixilart_logo.png'), zoom=0.7)
+    gimp_logo = ASSETS.image(os.path.join('assets', 'gallery', 'gimp_logo.png'), zoom=0.35)
+    fl_studio_logo = ASSETS.image(os.path.join('assets', 'gallery', 'fl_studio_logo.png'), zoom=0.75)
 
     used_resources = [coding_resources(), info_resources(), art_resources()]
+    for _, rect in used_resources[1:]:
+        rect.x = screen_width
 
-    return credit_title, authors_title, authors, used_resources_title, back_button, used_resources
-
-
-def credit_screen_update(screen: pygame.Surface, screen_width: int, credit_title: pygame.Surface,
-                         authors_title: pygame.Surface, authors: list, used_resources_title: pygame.Surface,
-                         used_resources: list, used_resources_mode: int, back_button: Button, previous_mode: str,
-                         transit=False):
-    credit_screen_surf = pygame.Surface((screen_width, 600), pygame.SRCALPHA, 32)
-    credit_title_rect = credit_title.get_rect(center=(screen_width / 2, 50))
-    credit_screen_surf.blit(credit_title, credit_title_rect)
+    credit_header = pygame.Surface((screen_width, 600), pygame.SRCALPHA, 32)
+    credit_header.blit(credit_title, credit_title.get_rect(center=(screen_width / 2, 50)))
     h = 100
-    credit_screen_surf.blit(authors_title, (50, h))
+    credit_header.blit(authors_title, (50, h))
     h += 60
     for author in authors:
-        credit_screen_surf.blit(author, (50, h))
+        credit_header.blit(author, (50, h))
         h += 50
     h += 70
+    credit_header.blit(used_resources_title, (50, h))
+
+    return credit_header, used_resources, back_button
 
-    credit_screen_surf.blit(used_resources_title, (50, h))
-
-    if transit:
-        clock = pygame.time.Clock()
-        while used_resources[used_resources_mode][1].x < screen_width:
-            clock.tick(60)
-            screen.fill('#056E30')
-            used_resources[used_resources_mode][1].x += 20
-            screen.blit(used_resources[used_resources_mode][0], used_resources[used_resources_mode][1])
-            screen.blit(credit_screen_surf, (0, 0))
-            back_button.draw()
-
-            pygame.display.flip()
-        next_mode = used_resources_mode + 1 if used_resources_mode + 1 < len(used_resources) else 0
-        used_resources[next_mode][1].x = used_resources[used_resources_mode][1].x
-        while used_resources[next_mode][1].x > 0:
-            clock.tick(60)
-            screen.fill('#056E30')
-            used_resources[next_mode][1].x -= 20
-            screen.blit(used_resources[next_mode][0], used_resources[next_mode][1])
-            screen.blit(credit_screen_surf, (0, 0))
-            back_button.draw()
-
-            pygame.display.flip()
-        used_resources[used_resources_mode][1].x = 0
-    else:
-        screen.blit(used_resources[used_resources_mode][0], used_resources[used_resources_mode][1])
-
-    screen.blit(credit_screen_surf, (0, 0))
+
+def credit_screen_update(screen: pygame.Surface, screen_width: int, credit_header: pygame.Surface,
+                         used_resources: list, back_button: Button, previous_mode: str):
+    screen.fill('#056E30')
+    for surf, rect in used_resources:
+        if rect.x < screen_width:
+            screen.blit(surf, rect)
+    screen.blit(credit_header, (0, 0))
 
     back_button.draw()
     if back_button.is_clicked():
-        return previous_mode, used_resources_mode
-    return 'credit_screen', used_resources_mode
+        return previous_mode
+    return 'credit_screen'
+
+
+def credit_screen_rotate(used_resources: list, screen_width: int, shown: int):
+    # the shown panel slides out to the right, then the next one slides in from the right
+    following = (shown + 1) % len(used_resources)
+    current_rect, following_rect = used_resources[shown][1], used_resources[following][1]
+    following_rect.x = screen_width
+    TWEENS.add(current_rect, 'x', screen_width, CREDITS_SLIDE,
+               then=lambda: TWEENS.add(following_rect, 'x', 0, CREDITS_SLIDE))
+    return following
 
 
 def game_menu_build(screen: pygame.Surface, screen_width: int, screen_height: int):
-    main_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 100)
-    sub_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-Italic.ttf'), 80)
+    main_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 100)
+    sub_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-Italic.ttf'), 80)
     menu_title = main_font.render('ПАУЗА', True, '#B69945')
     menu_sub_title = sub_font.render('Български държавни символи', True, '#B69945')
     menu_continue_button = Button(screen, text='ПРОДЪЛЖИ', width=400, height=100,
@@ -1049,12 +1610,10 @@ def game_menu_build(screen: pygame.Surface, screen_width: int, screen_height: in
     menu_exit_button = Button(screen, text='ИЗХОД', width=400, height=100,
                               position=(screen_width // 2 - 200, screen_height - 450), button_font_size=40, elevation=4)
     menu_images_left = [
-        pygame.transform.rotozoom(pygame.image.load(os.path.join('assets', 'gallery', f'{path}.png')).convert_alpha(),
-                                  0, screen_height * 0.0013) for path in
+        ASSETS.image(os.path.join('assets', 'gallery', f'{path}.png'), zoom=screen_height * 0.0013) for path in
         'dimitrov_coat_of_arms\n1879-1881_coat_of_arms\nferdinant_coat_of_arms'.split('\n')]
     menu_images_right = [
-        pygame.transform.rotozoom(pygame.image.load(os.path.join('assets', 'gallery', f'{path}.png')).convert_alpha(),
-                                  0, screen_height * 0.0013) for path in
+        ASSETS.image(os.path.join('assets', 'gallery', f'{path}.png'), zoom=screen_height * 0.0013) for path in
         'boris3_coat_of_arms\nalexander_coat_of_arms\nzhivkov_coat_of_arms'.split('\n')]
 
     return menu_title, menu_sub_title, menu_continue_button, menu_back_to_start_button, menu_exit_button, \
@@ -1070,8 +1629,8 @@ def game_menu_update(screen: pygame.Surface, screen_width: int, screen_height: i
     if menu_continue_button.is_clicked():
         return previous_mode
     elif menu_back_to_start_button.is_clicked():
-        pygame.mixer.stop()
-        fade(screen, screen_width, screen_height,
+        AUDIO.stop()
+        fade(screen,
              lambda: draw_game_menu(screen, screen_width, screen_height, menu_title, menu_sub_title,
                                     menu_continue_button, menu_back_to_start_button, menu_exit_button, menu_images_left,
                                     menu_images_right))
@@ -1079,7 +1638,7 @@ def game_menu_update(screen: pygame.Surface, screen_width: int, screen_height: i
         levels = Levels(screen, screen_width, screen_height, player)
         return 'title_screen', player, levels
     elif menu_exit_button.is_clicked():
-        fade(screen, screen_width, screen_height,
+        fade(screen,
              lambda: draw_game_menu(screen, screen_width, screen_height, menu_title, menu_sub_title,
                                     menu_continue_button, menu_back_to_start_button, menu_exit_button, menu_images_left,
                                     menu_images_right))
@@ -1111,8 +1670,8 @@ def draw_game_menu(screen: pygame.Surface, screen_width: int, screen_height: int
 
 
 def victory_screen_build(screen: pygame.Surface, screen_width: int, screen_height: int):
-    main_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 100)
-    sub_font = pygame.font.Font(os.path.join('assets', 'fonts', 'NotoSerif-Italic.ttf'), 80)
+    main_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 100)
+    sub_font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-Italic.ttf'), 80)
     victory_title = main_font.render('ТИ ПОБЕДИ', True, '#B69945')
     victory_sub_title = sub_font.render('Български държавни символи', True, '#B69945')
     victory_continue_button = Button(screen, text='ПРОДЪЛЖИ', width=400, height=100,
@@ -1124,13 +1683,11 @@ def victory_screen_build(screen: pygame.Surface, screen_width: int, screen_heigh
     victory_back_to_start_button = Button(screen, text='КЪМ НАЧАЛОТО', width=400, height=100,
                                           position=(screen_width // 2 - 200, screen_height - 450), button_font_size=40,
                                           elevation=4)
-    flag_cup = pygame.transform.scale(pygame.image.load(os.path.join('assets', 'gallery', 'f_cup.png')).convert_alpha(),
-                                      (screen_width // 328 * 100, screen_height // 460 * 300))
-    coat_of_arms_cup = pygame.transform.scale(
-        pygame.image.load(os.path.join('assets', 'gallery', 's_cup.png')).convert_alpha(),
-        (screen_width // 323 * 100, screen_height // 452 * 300))
-    victory_screen_music = pygame.mixer.Sound(os.path.join('assets', 'music', 'shumi_marica.mp3'))
-    victory_screen_music.set_volume(0.05)
+    flag_cup = ASSETS.image(os.path.join('assets', 'gallery', 'f_cup.png'),
+                            size=(screen_width // 328 * 100, screen_height // 460 * 300))
+    coat_of_arms_cup = ASSETS.image(os.path.join('assets', 'gallery', 's_cup.png'),
+                                    size=(screen_width // 323 * 100, screen_height // 452 * 300))
+    victory_screen_music = os.path.join('assets', 'music', 'shumi_marica.mp3')
 
     return victory_title, victory_sub_title, victory_continue_button, victory_back_to_start_button, \
         victory_credit_button, flag_cup, coat_of_arms_cup, victory_screen_music
@@ -1140,23 +1697,22 @@ def victory_screen_update(screen: pygame.Surface, screen_width: int, screen_heig
                           victory_title: pygame.Surface, victory_sub_title: pygame.Surface,
                           victory_continue_button: Button, victory_back_to_start_button: Button,
                           victory_credit_button: Button, flag_cup: pygame.Surface, coat_of_arms_cup: pygame.Surface,
-                          victory_screen_music: pygame.mixer.Sound):
+                          victory_screen_music: str):
     draw_victory_screen(screen, screen_width, screen_height, victory_title, victory_sub_title, victory_continue_button,
                         victory_back_to_start_button, victory_credit_button, flag_cup, coat_of_arms_cup)
-    if not muted:
-        victory_screen_music.play()
+    AUDIO.play('background', victory_screen_music, volume=0.05, loops=0)
 
     if victory_continue_button.is_clicked():
         player.x = 10
-        victory_screen_music.fadeout(3000)
-        fade(screen, screen_width, screen_height,
+        AUDIO.fadeout('background', 3000)
+        fade(screen,
              lambda: draw_victory_screen(screen, screen_width, screen_height, victory_title, victory_sub_title,
                                          victory_continue_button, victory_back_to_start_button, victory_credit_button,
                                          flag_cup, coat_of_arms_cup))
         return 'map'
     elif victory_back_to_start_button.is_clicked():
-        victory_screen_music.fadeout(3000)
-        fade(screen, screen_width, screen_height,
+        AUDIO.fadeout('background', 3000)
+        fade(screen,
              lambda: draw_victory_screen(screen, screen_width, screen_height, victory_title, victory_sub_title,
                                          victory_continue_button, victory_back_to_start_button, victory_credit_button,
                                          flag_cup, coat_of_arms_cup))
@@ -1183,6 +1739,14 @@ def draw_victory_screen(screen: pygame.Surface, screen_width: int, screen_height
     victory_back_to_start_button.draw()
 
 
+def simulate(mode: str, player: Player, levels: Levels, colliding: bool):
+    match mode:
+        case 'map':
+            player.step(player.map_update)
+        case 'level_1' | 'level_2' | 'level_3' if not colliding:
+            player.step(player.room_update, levels.rooms[int(mode[-1])].platform_grid)
+
+
 def draw_map(screen: pygame.Surface, player: Player, uprising_house_surf: pygame.Surface,
              uprising_house_rect: pygame.Rect, tsar_house_surf: pygame.Surface, tsar_house_rect: pygame.Rect,
              communist_house_surf: pygame.Surface, communist_house_rect: pygame.Rect):
@@ -1190,207 +1754,295 @@ def draw_map(screen: pygame.Surface, player: Player, uprising_house_surf: pygame
     screen.blit(uprising_house_surf, uprising_house_rect)
     screen.blit(tsar_house_surf, tsar_house_rect)
     screen.blit(communist_house_surf, communist_house_rect)
-    screen.blit(player.image, player.rect)
-    screen.blit(player.map_ground[0], player.map_ground[2])
-
-
-def fade(screen: pygame.Surface, width: int, height: int, func: Callable, start=0, end=270, step=1, color='#000000'):
-    fading = pygame.Surface((width, height))
-    fading.fill(color)
-    for alpha in range(start, end, step):
-        fading.set_alpha(alpha)
-        func()
-        screen.blit(fading, (0, 0))
-        pygame.display.update()
-        if alpha % 2 == 0:
-            pygame.time.delay(1)
-
-
-def main():
-    global muted
-
-    screen_width, screen_height = INFO.current_w, INFO.current_h
-    SCREEN_WIDTH, SCREEN_HEIGHT = screen_width, screen_height
-
-    mode = 'title_screen'
-
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED)
-    pygame.display.set_caption('Български държавни символи')
-    pygame.display.set_icon(pygame.image.load(os.path.join('assets', 'gallery', 'title_screen_logo.png')))
-    clock = pygame.time.Clock()
-
-    player = Player(SCREEN_WIDTH, SCREEN_HEIGHT)
-
-    uprising_house_surf, uprising_house_rect = init_room_objects((255, 171), 250, player.map_ground[2].y, 'house',
-                                                                 'uprising')
-    tsar_house_surf, tsar_house_rect = init_room_objects((528, 281), 700, player.map_ground[2].y, 'house', 'tsar')
-    communist_house_surf, communist_house_rect = init_room_objects((473, 286), 1270, player.map_ground[2].y, 'house',
-                                                                   'communist')
-
-    title, start_button, credit_button, exit_button, title_screen_image, title_screen_music = \
-        title_screen_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
-    credit_title, authors_title, authors, used_resources_title, back_button, used_resources = \
-        credit_screen_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
-    used_resources_mode, used_resources_timer = 0, 0
-    menu_title, menu_sub_title, menu_continue_button, menu_back_to_start_button, menu_exit_button, menu_images_left, \
-        menu_images_right = game_menu_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
-    victory_title, victory_sub_title, victory_continue_button, victory_back_to_start_button, victory_credit_button, \
-        flag_cup, coat_of_arms_cup, victory_screen_music = victory_screen_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+    screen.blit(player.image, player.draw_rect)
+    screen.blit(*player.map_ground)
+
+
+def draw_loading(screen: pygame.Surface, screen_width: int, screen_height: int):
+    font = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-Italic.ttf'), 40)
+    loading = font.render('Зареждане...', True, '#B69945')
+    screen.fill('#000000')
+    screen.blit(loading, loading.get_rect(center=(screen_width // 2, screen_height // 2)))
+    pygame.display.update()
+
+
+def fade(screen: pygame.Surface, func: Callable, fade_in=False, then: Callable = None, color='#000000'):
+    func()
+    TRANSITION.start(screen, fade_in, then, color)
+
+
+class Game:
+    # everything main() keeps between frames, frame() runs one pass of the state machine
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.screen_width, self.screen_height = screen.get_size()
+        SCREEN_WIDTH, SCREEN_HEIGHT = self.screen_width, self.screen_height
+
+        self.mode = 'title_screen'
+        self.running = True
+
+        self.player = Player(SCREEN_WIDTH, SCREEN_HEIGHT)
+        ground = self.player.map_ground[1].y
+        self.uprising_house_surf, self.uprising_house_rect = init_room_objects((255, 171), 250, ground, 'house',
+                                                                               'uprising')
+        self.tsar_house_surf, self.tsar_house_rect = init_room_objects((528, 281), 700, ground, 'house', 'tsar')
+        self.communist_house_surf, self.communist_house_rect = init_room_objects((473, 286), 1270, ground, 'house',
+                                                                                 'communist')
+
+        self.title, self.start_button, self.credit_button, self.exit_button, self.title_screen_image, \
+            self.title_screen_music = title_screen_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.credit_header, self.used_resources, self.back_button = credit_screen_build(screen, SCREEN_WIDTH,
+                                                                                        SCREEN_HEIGHT)
+        self.used_resources_mode, self.used_resources_switch_at = 0, 0
+        self.menu_title, self.menu_sub_title, self.menu_continue_button, self.menu_back_to_start_button, \
+            self.menu_exit_button, self.menu_images_left, self.menu_images_right = \
+            game_menu_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.victory_title, self.victory_sub_title, self.victory_continue_button, self.victory_back_to_start_button, \
+            self.victory_credit_button, self.flag_cup, self.coat_of_arms_cup, self.victory_screen_music = \
+            victory_screen_build(screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        self.threshold = 7
+        self.victory = False
+
+        self.colliding = False
+        self.previous_mode = None
+        self.first_time = True
+
+        self.levels = Levels(screen, SCREEN_WIDTH, SCREEN_HEIGHT, self.player)
+
+        self.presented_state = None
+        self.presented_looks = None
+
+    def houses(self):
+        return (self.uprising_house_surf, self.uprising_house_rect, self.tsar_house_surf, self.tsar_house_rect,
+                self.communist_house_surf, self.communist_house_rect)
+
+    def buttons(self, mode: str):
+        match mode:
+            case 'title_screen':
+                return self.start_button, self.credit_button, self.exit_button
+            case 'credit_screen':
+                return self.back_button,
+            case 'game_menu':
+                return self.menu_continue_button, self.menu_back_to_start_button, self.menu_exit_button
+            case 'victory_screen':
+                return self.victory_continue_button, self.victory_back_to_start_button, self.victory_credit_button
+        return ()
 
-    user_answers = []
-    threshold = 7
-    victory = False
+    def looks(self, mode: str):
+        return [button.look() for button in self.buttons(mode)]
 
-    colliding = False
-    previous_mode = None
-    first_time = True
+    def idle(self):
+        # the screens draw their buttons before is_clicked() updates them, so a hover or press only shows up
+        # on the frame after it happened and the screen has to stay awake until that frame is presented
+        return (self.mode in STATIC_MODES and self.presented_state == (self.mode, self.victory)
+                and self.presented_looks == self.looks(self.mode) and not (TRANSITION.active or TWEENS.active))
 
-    levels = Levels(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player)
+    def deadlines(self):
+        return [AUDIO.switch_at] + ([self.used_resources_switch_at] if self.mode == 'credit_screen' else [])
 
-    running = True
-    while running:
-        clock.tick(60)
-        for event in pygame.event.get():
+    def frame(self, events: list):
+        screen, SCREEN_WIDTH, SCREEN_HEIGHT = self.screen, self.screen_width, self.screen_height
+        player, levels = self.player, self.levels
+        for event in events:
             if event.type == pygame.QUIT:
-                running = False
+                self.running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    running = False
-
-                if event.key == pygame.K_m:
-                    pygame.mixer.stop()
-                    muted = True
+                    self.running = False
+
+                if event.key == pygame.K_F3:
+                    PROFILER.visible = not PROFILER.visible
+                if event.key == pygame.K_F4:
+                    PROFILER.dump_csv(time.strftime('frame_profile_%Y%m%d_%H%M%S.csv'))
+        INPUT.sample()
+        if INPUT.pressed('mute'):
+            AUDIO.mute()
+        PROFILER.lap('events')
+
+        mode = self.mode
+        frame_state = mode, self.victory
+
+        transitioning = TRANSITION.active
+        if transitioning:
+            TIMESTEP.reset()
+        drawn_looks = None if transitioning else self.looks(mode)
+        for _ in range(TIMESTEP.advance()):
+            simulate(mode, player, levels, self.colliding)
+        player.alpha = TIMESTEP.alpha()
+        TWEENS.update()
+        PROFILER.lap('update')
 
         match mode:
+            case _ if transitioning:
+                # the scene stays frozen until the transition that left it has finished
+                pass
+
             case 'title_screen':
-                mode = title_screen_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, title, start_button, credit_button,
-                                           exit_button, title_screen_image, title_screen_music, first_time)
+                mode = title_screen_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, self.title, self.start_button,
+                                           self.credit_button, self.exit_button, self.title_screen_image,
+                                           self.title_screen_music, self.first_time)
                 if mode[0] == 'credit_screen':
-                    previous_mode = 'title_screen'
-                mode, first_time = mode
+                    self.previous_mode = 'title_screen'
+                mode, self.first_time = mode
 
             case 'credit_screen':
-                screen.fill('#056E30')
-                used_resources_timer += 1
-                if used_resources_timer == 420:
-                    mode, used_resources_mode = credit_screen_update(screen, SCREEN_WIDTH, credit_title, authors_title,
-                                                                     authors, used_resources_title, used_resources,
-                                                                     used_resources_mode, back_button, previous_mode,
-                                                                     True)
-                    used_resources_mode += 1
-                    if used_resources_mode == 3:
-                        used_resources_mode = 0
-                    used_resources_timer = 0
-                    continue
-                mode, used_resources_mode = credit_screen_update(screen, SCREEN_WIDTH, credit_title, authors_title,
-                                                                 authors, used_resources_title, used_resources,
-                                                                 used_resources_mode, back_button, previous_mode)
+                if not self.presented_state or self.presented_state[0] != mode:
+                    self.used_resources_switch_at = pygame.time.get_ticks() + CREDITS_INTERVAL
+                if pygame.time.get_ticks() >= self.used_resources_switch_at:
+                    self.used_resources_mode = credit_screen_rotate(self.used_resources, SCREEN_WIDTH,
+                                                                    self.used_resources_mode)
+                    self.used_resources_switch_at = pygame.time.get_ticks() + 2 * CREDITS_SLIDE + CREDITS_INTERVAL
+                mode = credit_screen_update(screen, SCREEN_WIDTH, self.credit_header, self.used_resources,
+                                            self.back_button, self.previous_mode)
 
             case 'game_menu':
-                if muted:
-                    pygame.mixer.stop()
-
-                mode = game_menu_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, menu_title, menu_sub_title,
-                                        menu_continue_button, menu_back_to_start_button, menu_exit_button,
-                                        menu_images_left, menu_images_right, previous_mode)
+                mode = game_menu_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, self.menu_title, self.menu_sub_title,
+                                        self.menu_continue_button, self.menu_back_to_start_button,
+                                        self.menu_exit_button, self.menu_images_left, self.menu_images_right,
+                                        self.previous_mode)
                 if type(mode) is tuple:
-                    mode, player, level = mode
+                    mode, self.player, self.levels = mode
 
             case 'victory_screen':
-                mode = victory_screen_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player, victory_title,
-                                             victory_sub_title, victory_continue_button, victory_back_to_start_button,
-                                             victory_credit_button, flag_cup, coat_of_arms_cup, victory_screen_music)
+                mode = victory_screen_update(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player, self.victory_title,
+                                             self.victory_sub_title, self.victory_continue_button,
+                                             self.victory_back_to_start_button, self.victory_credit_button,
+                                             self.flag_cup, self.coat_of_arms_cup, self.victory_screen_music)
                 if type(mode) is tuple:
-                    mode, player, level = mode
+                    mode, self.player, self.levels = mode
                 if mode == 'credit_screen':
-                    previous_mode = 'victory_screen'
+                    self.previous_mode = 'victory_screen'
 
             case 'map':
-                if first_time:
-                    fade(screen, SCREEN_WIDTH, SCREEN_HEIGHT,
-                         lambda: draw_map(screen, player, uprising_house_surf, uprising_house_rect, tsar_house_surf,
-                                          tsar_house_rect, communist_house_surf, communist_house_rect), start=270,
-                         end=0,
-                         step=-1)
-                    first_time = False
-
-                if not muted:
-                    title_screen_music.play(loops=-1)
-
-                draw_map(screen, player, uprising_house_surf, uprising_house_rect, tsar_house_surf, tsar_house_rect,
-                         communist_house_surf, communist_house_rect)
-                player.map_update()
+                if self.first_time:
+                    fade(screen, lambda: draw_map(screen, player, *self.houses()), fade_in=True)
+                    self.first_time = False
+
+                AUDIO.play('background', self.title_screen_music, volume=0.05)
+
+                PROFILER.lap('update')
+                draw_map(screen, player, *self.houses())
+                RENDERER.use_dirty_rects()
+                RENDERER.add(player.draw_rect)
+                PROFILER.lap('draw')
                 results = [enter_room(player, rect) for rect in
-                           (uprising_house_rect, tsar_house_rect, communist_house_rect)]
+                           (self.uprising_house_rect, self.tsar_house_rect, self.communist_house_rect)]
                 for level, result in enumerate(results, 1):
                     if result:
-                        title_screen_music.fadeout(2700)
-                        fade(screen, SCREEN_WIDTH, SCREEN_HEIGHT,
-                             lambda: draw_map(screen, player, uprising_house_surf, uprising_house_rect, tsar_house_surf,
-                                              tsar_house_rect, communist_house_surf, communist_house_rect))
-                        first_time = True
+                        AUDIO.fadeout('background', 2700)
+                        # the room is built once the map has faded out, behind the loading screen
+                        fade(screen, lambda: draw_map(screen, player, *self.houses()),
+                             then=lambda level=level: levels.build(level, screen, player))
+                        self.first_time = True
                         mode = 'level_' + str(level)
 
-                if pygame.key.get_pressed()[pygame.K_p]:
-                    previous_mode = mode
+                if INPUT.pressed('pause'):
+                    self.previous_mode = mode
                     mode = 'game_menu'
 
             # in room actions
-            case 'level_1':
-                if first_time:
-                    player.rect.x, player.rect.y = 20, player.map_ground[2].y - player.rect.height
-                    fade(screen, SCREEN_WIDTH, SCREEN_HEIGHT, lambda: levels.level_1_draw(screen, player), start=270,
-                         end=0, step=-1)
-                    first_time = False
-                    pygame.mixer.stop()
-                mode, colliding, first_time = levels.level_1(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player, mode,
-                                                             colliding, first_time, uprising_house_rect)
-                if pygame.key.get_pressed()[pygame.K_p]:
-                    previous_mode = mode
-                    mode = 'game_menu'
-
-            case 'level_2':
-                if first_time:
-                    player.rect.x, player.rect.y = 20, player.map_ground[2].y - player.rect.height
-                    fade(screen, SCREEN_WIDTH, SCREEN_HEIGHT, lambda: levels.level_2_draw(screen, player), start=270,
-                         end=0, step=-1)
-                    first_time = False
-                    pygame.mixer.stop()
-                mode, colliding, first_time = levels.level_2(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player, mode,
-                                                             colliding, first_time, tsar_house_rect)
-                if pygame.key.get_pressed()[pygame.K_p]:
-                    previous_mode = mode
-                    mode = 'game_menu'
-
-            case 'level_3':
-                if first_time:
-                    player.rect.x, player.rect.y = 20, player.map_ground[2].y - player.rect.height
-                    fade(screen, SCREEN_WIDTH, SCREEN_HEIGHT, lambda: levels.level_3_draw(screen, player, victory),
-                         start=270, end=0, step=-1)
-                    first_time = False
-                    pygame.mixer.stop()
-                mode, colliding, first_time = levels.level_3(screen, SCREEN_WIDTH, SCREEN_HEIGHT, player, mode,
-                                                             colliding, first_time, communist_house_rect, victory)
-                if pygame.key.get_pressed()[pygame.K_p]:
-                    previous_mode = mode
+            case 'level_1' | 'level_2' | 'level_3':
+                level = int(mode[-1])
+                if self.first_time:
+                    player.rect.x, player.rect.y = 20, player.map_ground[1].y - player.rect.height
+                    fade(screen, lambda: levels.room_draw(level, screen, player, self.victory), fade_in=True)
+                    self.first_time = False
+                    AUDIO.stop()
+                house_rect = (self.uprising_house_rect, self.tsar_house_rect, self.communist_house_rect)[level - 1]
+                mode, self.colliding, self.first_time = levels.room(level, screen, player, mode, self.first_time,
+                                                                    house_rect, self.victory)
+                if INPUT.pressed('pause'):
+                    self.previous_mode = mode
                     mode = 'game_menu'
 
             case 'exit':
-                running = False
+                self.running = False
+        self.mode = mode
 
-        if not victory:
-            for dictionary in [levels.uprising_infoboxes, levels.tsar_infoboxes, levels.communist_infoboxes]:
-                for key, infobox in dictionary.items():
+        if not self.victory:
+            user_answers = []
+            for room in self.levels.rooms.values():
+                for key, infobox in room.infoboxes.items():
                     if 'question' in key:
                         user_answers.append(infobox.is_correct)
-            if len([boolean for boolean in user_answers if boolean]) >= threshold and None not in user_answers:
-                victory = True
-        user_answers = []
+            if len([boolean for boolean in user_answers if boolean]) >= self.threshold and None not in user_answers:
+                self.victory = True
+
+        AUDIO.update()
+        PROFILER.lap('update')
+        if TRANSITION.active:
+            TRANSITION.draw(screen)
+            PROFILER.lap('draw')
+        if PROFILER.visible:
+            RENDERER.add(PROFILER.draw(screen))
+            PROFILER.lap('overlay')
+        if frame_state != self.presented_state:
+            RENDERER.invalidate()
+            self.presented_state = frame_state
+        self.presented_looks = drawn_looks
+        RENDERER.present()
+        PROFILER.lap('display')
+
+
+def open_display(resolution: tuple[int, int] = RENDER_RESOLUTION):
+    # the game draws on a canvas of this size and SDL scales it to the display once per present,
+    # without a resolution it draws at the native size of the monitor
+    native = INFO.current_w, INFO.current_h
+    size = tuple(resolution or native)
+    # a plain window when no scaling is needed, partial display updates only take effect there
+    RENDERER.scaled = size != native
+    return pygame.display.set_mode(size, pygame.SCALED | pygame.FULLSCREEN if RENDERER.scaled else 0)
+
+
+def main(resolution: tuple[int, int] = RENDER_RESOLUTION):
+    screen = open_display(resolution)
+    screen_width, screen_height = screen.get_size()
 
+    pygame.display.set_caption('Български държавни символи')
+    clock = pygame.time.Clock()
+
+    LOADER.preload(ATLAS.startup_paths(STARTUP_ASSETS))
+    loading_title = ASSETS.font(os.path.join('assets', 'fonts', 'NotoSerif-BoldItalic.ttf'), 80).render(
+        'Български държавни символи', True, '#B69945')
+    while not LOADER.done():
+        clock.tick(60)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                LOADER.shutdown()
+                pygame.quit()
+                return
+        title_screen_loading_draw(screen, screen_width, screen_height, loading_title, LOADER.progress())
         pygame.display.update()
+    pygame.display.set_icon(ASSETS.image(os.path.join('assets', 'gallery', 'title_screen_logo.png')))
+
+    game = Game(screen)
+    while game.running:
+        PROFILER.next_frame()
+        if game.idle():
+            # nothing animates on these screens, so only wake up for input or a scheduled change
+            events = wait_for_events(game.deadlines())
+            TIMESTEP.reset()
+            if not events and not (game.mode == 'credit_screen'
+                                   and pygame.time.get_ticks() >= game.used_resources_switch_at):
+                AUDIO.update()
+                continue
+        else:
+            clock.tick(FRAME_RATE)
+            events = pygame.event.get()
+        PROFILER.lap('wait')
+        game.frame(events)
     pygame.quit()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Български държавни символи')
+    parser.add_argument('--native', action='store_true',
+                        help='draw at the size of the monitor instead of the 1920x1080 canvas the layout is written for')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
     print("Copyright (c) 2023 Victor L. Georgiev.\nAll Rights Reserved.")
-    main()
+    args = parse_args()
+    main(None if args.native else RENDER_RESOLUTION)
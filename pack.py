@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from main import ASSET_PACK, ASSET_PACK_HEADER, ASSET_PACK_MAGIC, ASSET_PACK_VERSION, pack_name  # noqa: E402
+
+SOURCE_DIRECTORY = 'assets'
+
+
+def collect(source: str):
+    paths = []
+    for directory, directories, files in os.walk(source):
+        directories.sort()
+        paths.extend(os.path.join(directory, name) for name in sorted(files))
+    return paths
+
+
+def build_pack(source: str, output: str):
+    paths = collect(source)
+    index, offset = {}, 0
+    for path in paths:
+        size = os.path.getsize(path)
+        # offsets are relative to the end of the index, the game adds the header and index size back
+        index[pack_name(path)] = [offset, size]
+        offset += size
+    encoded = json.dumps(index, separators=(',', ':')).encode('utf8')
+
+    # write next to the old pack and swap, a running game may still have it mapped
+    temporary = output + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(ASSET_PACK_HEADER.pack(ASSET_PACK_MAGIC, ASSET_PACK_VERSION, len(encoded)))
+        file.write(encoded)
+        for path in paths:
+            with open(path, 'rb') as asset:
+                file.write(asset.read())
+    os.replace(temporary, output)
+    return index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Bundle the assets directory into a single memory-mapped pack.')
+    parser.add_argument('--source', default=SOURCE_DIRECTORY, help='directory to pack, paths keep it as prefix')
+    parser.add_argument('--output', default=ASSET_PACK, help='pack file to write')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    index = build_pack(args.source, args.output)
+    sys.stdout.write(f'{len(index)} files ({os.path.getsize(args.output) / 1024 / 1024:.1f} MiB) '
+                     f'written to {args.output}\n')